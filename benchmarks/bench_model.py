@@ -0,0 +1,137 @@
+"""
+Сценарии замеров производительности SumModel
+Содержит:
+* CASES - список сценариев Case(имя, подготовка, единиц работы, тяжёлый ли сценарий).
+"""
+
+import io
+import os
+import sys
+from collections import namedtuple
+
+import numpy as np
+from scipy.special import jn_zeros
+
+# модели импортируются под теми же именами, что и в GUI и cli (models.*), см. models/kernels.py
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from models import kernels
+from models.model import SumModel
+
+# setup() возвращает функцию без аргументов, время выполнения которой замеряется;
+# units - количество единиц работы (точек × слагаемых, вызовов и т.п.) за один вызов этой функции
+Case = namedtuple('Case', ['name', 'setup', 'units', 'heavy'])
+
+N_VALUES = (10, 100, 1250)
+GRID_SIZES = (800, 10 ** 4, 10 ** 5, 10 ** 6)
+
+
+def _term(n):
+    model = SumModel()
+    return lambda: model._calculate_term(n, 1.0, 0.5)
+
+
+def _calculate_sum(n):
+    model = SumModel()
+    return lambda: model.calculate_sum(1.0, 0.5, n)
+
+
+def _generate_w_data(n, p, backend):
+    model = SumModel(backend=backend)
+    return lambda: model.generate_w_data(n, 1.0, p, 150 if p == 'r' else 4, 0.01)
+
+
+def _sum_array(n, points):
+    model = SumModel()
+    t = np.linspace(0.001, 150, points)
+    return lambda: model.calculate_sum_array(1.0, t, n)
+
+
+def _iterations(epsilons, times):
+    model = SumModel()
+
+    def run():
+        for epsilon in epsilons:
+            for t in times:
+                model.calculate_number_of_iterations(epsilon, t)
+    return run
+
+
+def _iterations_array(epsilons, times):
+    model = SumModel()
+    return lambda: model.calculate_number_of_iterations_array(epsilons[:, None], times[None, :])
+
+
+def _interaction(n, p):
+    """
+    Один ввод в GUI в режиме подбора N по точности: подбор N в View.update_values
+    (контроллер получает его вместе со значениями полей), затем расчёт графика моделью, которой владеет контроллер.
+    """
+    model = SumModel()
+
+    def run():
+        model.calculate_number_of_iterations(0.01, 2)
+        model.generate_w_data(n, 2, p, 150 if p == 'r' else 4, 0.01)
+    return run
+
+
+def _per_call_model():
+    """
+    Новая SumModel вместе с работой прежнего конструктора, который каждый раз считал jn_zeros(0, 1251)
+    """
+    jn_zeros(0, 1251)
+    return SumModel()
+
+
+def _interaction_per_call_model(n, p):
+    """
+    Тот же ввод в прежнем виде, для сравнения с _interaction: View.get_current_values подбирал N
+    при каждом сравнении полей (в entry_is_changed и в update_values), контроллер создавал новую модель
+    в updateN и в compute_plot_data и ещё раз подбирал N, а generate_w_data печатал w[0] (вывод идёт в память).
+    """
+    out = io.StringIO()
+
+    def run():
+        _per_call_model().calculate_number_of_iterations(0.01, 2)
+        _per_call_model().calculate_number_of_iterations(0.01, 2)
+        model = _per_call_model()
+        model.calculate_number_of_iterations(0.01, 2)
+        ox, w = model.generate_w_data(n, 2, p, 150 if p == 'r' else 4, 0.01)
+        print(w[0], file=out)
+        out.seek(0)
+        out.truncate()
+    return run
+
+
+def _build_cases():
+    cases = [Case('SumModel()', lambda: SumModel, 1, False)]
+    for n in N_VALUES:
+        cases.append(Case('_calculate_term[n=%d]' % n, lambda n=n: _term(n), 1, False))
+        cases.append(Case('calculate_sum[N=%d]' % n, lambda n=n: _calculate_sum(n), n, False))
+        for p in ('r', 't'):
+            cases.append(Case('generate_w_data[p=%s,N=%d]' % (p, n),
+                              lambda n=n, p=p: _generate_w_data(n, p, 'numpy'), 800 * n, False))
+            cases.append(Case('generate_w_data[p=%s,N=%d,scalar]' % (p, n),
+                              lambda n=n, p=p: _generate_w_data(n, p, 'python'), 800 * n, n > 10))
+            if kernels.AVAILABLE:
+                cases.append(Case('generate_w_data[p=%s,N=%d,numba]' % (p, n),
+                                  lambda n=n, p=p: _generate_w_data(n, p, 'numba'), 800 * n, False))
+        for points in GRID_SIZES:
+            cases.append(Case('calculate_sum_array[N=%d,points=%d]' % (n, points),
+                              lambda n=n, points=points: _sum_array(n, points), n * points,
+                              n * points > 10 ** 7))
+    for p in ('r', 't'):
+        cases.append(Case('interaction[p=%s,N=100]' % p, lambda p=p: _interaction(100, p), 1, False))
+        cases.append(Case('interaction[p=%s,N=100,per_call_model]' % p,
+                          lambda p=p: _interaction_per_call_model(100, p), 1, False))
+    epsilons = np.logspace(-1, -8, 8)
+    times = np.logspace(-3, np.log10(150), 50)
+    cases.append(Case('calculate_number_of_iterations[8x50]', lambda: _iterations(epsilons, times), 400, False))
+    cases.append(Case('calculate_number_of_iterations_array[8x50]',
+                      lambda: _iterations_array(epsilons, times), 400, False))
+    return cases
+
+
+CASES = _build_cases()
@@ -0,0 +1,106 @@
+"""
+Запуск замеров производительности и сравнение с сохранённым базовым уровнем.
+
+Примеры (из корня репозитория):
+    python -m benchmarks.run --save baseline.json
+    python -m benchmarks.run --compare baseline.json --threshold 0.15
+    python -m benchmarks.run --quick --filter generate_w_data
+
+Для каждого сценария сохраняется лучшее время вызова и пропускная способность (единиц работы в секунду).
+При --compare процесс завершается с кодом 1, если пропускная способность какого-либо сценария
+упала больше чем на threshold относительно базового уровня.
+"""
+
+import argparse
+import json
+import sys
+import time
+
+from benchmarks.bench_model import CASES
+
+
+def measure(function, min_time=0.2, repeat=5) -> float:
+    """
+    Замеряет время одного вызова функции
+
+    :param function: функция без аргументов
+    :param min_time: минимальное время одного замера, с (определяет количество вызовов в замере)
+    :param repeat: количество замеров
+
+    :return лучшее время одного вызова, с
+    """
+    start = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - start
+    number = max(1, int(min_time / elapsed)) if elapsed > 0 else 1000
+    best = elapsed
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def run(cases, quick=False, min_time=0.2, repeat=5) -> dict:
+    """
+    :param cases: сценарии из bench_model.CASES
+    :param quick: пропустить тяжёлые сценарии
+
+    :return словарь имя -> {'seconds': время вызова, 'throughput': единиц работы в секунду}
+    """
+    results = {}
+    for case in cases:
+        if quick and case.heavy:
+            continue
+        seconds = measure(case.setup(), min_time, repeat)
+        results[case.name] = {'seconds': seconds, 'throughput': case.units / seconds}
+        print('%-55s %12.3e s %12.3e units/s' % (case.name, seconds, case.units / seconds))
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """
+    :param results: текущие результаты
+    :param baseline: сохранённые результаты
+    :param threshold: допустимое относительное падение пропускной способности
+
+    :return список строк с описанием регрессий (пустой, если их нет)
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        ratio = result['throughput'] / baseline[name]['throughput']
+        if ratio < 1 - threshold:
+            regressions.append('%s: %.1f%% от базового уровня' % (name, 100 * ratio))
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.run', description='Замеры производительности SumModel')
+    parser.add_argument('--save', help='сохранить результаты в JSON файл')
+    parser.add_argument('--compare', help='JSON файл с базовым уровнем')
+    parser.add_argument('--threshold', type=float, default=0.1, help='допустимое падение пропускной способности (доля)')
+    parser.add_argument('--filter', default='', help='запускать только сценарии, в имени которых есть эта строка')
+    parser.add_argument('--quick', action='store_true', help='пропустить тяжёлые сценарии')
+    parser.add_argument('--min-time', type=float, default=0.2, help='минимальное время одного замера, с')
+    parser.add_argument('--repeat', type=int, default=5, help='количество замеров')
+    args = parser.parse_args(argv)
+
+    cases = [case for case in CASES if args.filter in case.name]
+    results = run(cases, args.quick, args.min_time, args.repeat)
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for regression in regressions:
+            print('РЕГРЕССИЯ ' + regression)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,126 @@
+"""
+Консольный запуск расчёта без графического интерфейса.
+Не импортирует tkinter и matplotlib, поэтому работает на машинах без дисплея.
+
+Примеры (из каталога src):
+    python -m cli --N 100 --p r --r 1 --x 150 -o w.npy
+    python -m cli --K E --E 0.001 --p t --r 2 --x 4 -o w.csv
+    python -m cli --job jobs.json --workers 8 -o results.npy
+
+Файл задания (JSON или YAML) содержит словарь параметров или список словарей с ключами
+как у values контроллера (N, K, E, p, r, x) и, при необходимости, константами модели (R, l, alpha, k, c ...).
+Если у задания есть ключ "output", его результат пишется в этот файл, остальные результаты
+складываются в файл из --output.
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+
+import numpy as np
+
+from models import batch, profiling
+
+# значения по умолчанию такие же, как в контроллере
+DEFAULT_VALUES = {'N': 6, 'K': 'N', 'E': 0.01, 'p': 'r', 'r': 0, 'x': 150}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m cli', description='Расчёт w(r, t) без графического интерфейса')
+    parser.add_argument('--job', help='файл задания .json, .yaml или .yml')
+    parser.add_argument('--N', type=int, help='количество элементов ряда')
+    parser.add_argument('--K', choices=('N', 'E'), help="'E' - подобрать N по точности E")
+    parser.add_argument('--E', type=float, help='точность')
+    parser.add_argument('--p', choices=('r', 't'), help="'r' - зависимость от t при фиксированном r, 't' - от r при фиксированном t")
+    parser.add_argument('--r', type=float, help='фиксированный параметр (r при p=r, t при p=t)')
+    parser.add_argument('--x', type=float, help='правая граница промежутка')
+    for key in batch.MODEL_KEYS:
+        parser.add_argument('--' + key, type=float, help='константа модели ' + key)
+    parser.add_argument('-o', '--output', help='файл результата .npy, .csv или .parquet')
+    parser.add_argument('--workers', type=int, default=1, help='количество процессов для списка заданий')
+    return parser.parse_args(argv)
+
+
+def load_jobs(path: str) -> list:
+    """
+    Читает файл задания
+
+    :param path: путь к .json, .yaml или .yml файлу
+
+    :return список словарей с параметрами
+    """
+    with open(path) as f:
+        if path.endswith(('.yaml', '.yml')):
+            try:
+                import yaml
+            except ImportError:
+                raise SystemExit('для файлов задания YAML нужен пакет PyYAML')
+            jobs = yaml.safe_load(f)
+        else:
+            jobs = json.load(f)
+    if isinstance(jobs, dict):
+        jobs = jobs.get('jobs', [jobs])
+    return [dict(DEFAULT_VALUES, **job) for job in jobs]
+
+
+def write_result(path: str, ox: np.ndarray, w: np.ndarray):
+    """
+    Записывает результат в файл, формат определяется по расширению.
+    .npy - массив (2, точки) для одного задания или (задания, 2, точки) для нескольких;
+    .csv и .parquet - столбцы job, x, w.
+
+    :param path: путь к файлу
+    :param ox: массив x формы (точки,) или (задания, точки)
+    :param w: массив w той же формы
+    """
+    ox = np.atleast_2d(ox)
+    w = np.atleast_2d(w)
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.npy':
+        data = np.stack([ox, w], axis=1)
+        np.save(path, data[0] if len(data) == 1 else data)
+        return
+    job = np.repeat(np.arange(len(ox)), ox.shape[1])
+    if extension == '.csv':
+        np.savetxt(path, np.column_stack([job, ox.ravel(), w.ravel()]), delimiter=',',
+                   header='job,x,w', comments='', fmt=['%d', '%.17g', '%.17g'])
+    elif extension == '.parquet':
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit('для вывода в Parquet нужен пакет pyarrow')
+        pq.write_table(pa.table({'job': job, 'x': ox.ravel(), 'w': w.ravel()}), path)
+    else:
+        raise SystemExit('неизвестный формат файла результата: %s' % path)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=os.environ.get('HEAT_LOG_LEVEL', 'WARNING'))
+    profiling.configure_from_env()
+    if args.job:
+        jobs = load_jobs(args.job)
+    else:
+        arguments = vars(args)
+        jobs = [dict(DEFAULT_VALUES, **{key: arguments[key] for key in list(DEFAULT_VALUES) + list(batch.MODEL_KEYS)
+                                         if arguments[key] is not None})]
+    results = list(batch.sweep(jobs, workers=args.workers, stack=False))
+
+    rest = []
+    for job, (ox, w) in zip(jobs, results):
+        if job.get('output'):
+            write_result(job['output'], ox, w)
+        else:
+            rest.append((ox, w))
+    if rest:
+        if not args.output:
+            raise SystemExit('не указан файл результата (--output или "output" в задании)')
+        write_result(args.output, np.stack([ox for ox, w in rest]), np.stack([w for ox, w in rest]))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -5,9 +5,37 @@
 * Controller - класс, который обрабатывает данные и получает/отправляет их модели и представлению.
 """
 
+import logging
+import os
+import threading
 import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
 from views.view import View
-from models import model
+from models import cache, export, model, profiling
+
+logger = logging.getLogger(__name__)
+
+# период опроса фонового расчёта из цикла событий Tk, мс
+POLL_MS = 50
+# параметры из view, которые не влияют на данные графика (N при K='E' уже подобран по E)
+_DISPLAY_ONLY = ('K', 'E')
+
+
+def curve_key(params: dict) -> str:
+    """
+    Ключ графика: одинаков для графиков с одинаковыми данными (константы модели, N, p, r, x).
+    По нему хранятся линии на холсте и записи кэша; подпись графика используется только для показа.
+
+    :param params: параметры расчёта одного графика (константы модели и values контроллера)
+    """
+    return cache.make_key({name: value for name, value in params.items() if name not in _DISPLAY_ONLY})
+
+
+def curve_label(N: int, p: str, r) -> str:
+    """
+    Подпись графика; r приводится к float, чтобы r=0 из значений по умолчанию и введённое 0 подписывались одинаково
+    """
+    return "N=" + str(N) + " " + str(p) + "=" + str(float(r))
 
 
 class Controller:
@@ -27,6 +55,20 @@ class Controller:
     * clear() и .plot(x, y) для очисти холста и отрисовки данных (x, y).
     Контроллер предоставляет следующие методы для использования представлением:
     * update_view - Обновляет данные для отрисовки и обновляет plot в представлении
+
+    Если в values['r'] кортеж значений, считается и рисуется семейство графиков
+    (SumModel.generate_w_family) - по одному на каждое значение.
+
+    session повторяет холст: это список export.Curve с одной записью на каждую линию (по ключу curve_key,
+    как линии в MPLgraph) и очищается вместе с холстом (clear_session);
+    export_session сохраняет его в файл, а load_session рисует сохранённые графики без пересчёта.
+
+    Расчёт выполняется в фоновом потоке, а результат забирается из цикла событий Tk через root.after,
+    поэтому окно не зависает на больших N. Если пользователь запросил новый график раньше,
+    чем посчитался предыдущий, устаревший запрос отменяется: у каждого запроса своё событие threading.Event,
+    которое модель проверяет между блоками слагаемых, так что уже начатый расчёт прерывается
+    (исключением model.Cancelled) и не задерживает новый. Ошибка расчёта показывается в строке состояния.
+    При закрытии окна (on_close) текущий расчёт прерывается, а пул потоков останавливается.
     """
 
     def __init__(self, root_tk: tk.Tk):
@@ -35,7 +77,21 @@ class Controller:
         """
         self.lbl = 1
         self.plot_data = None
+        self.plot_params = None
+        self.session = []
+        self.root = root_tk
+        # модель создаётся один раз; при изменении констант её нужно заменить через set_constants
+        self.model = model.SumModel()
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        # HEAT_PROFILE включает замеры времени (см. models/profiling.py)
+        profiling.configure_from_env()
+        # повторные графики с теми же параметрами берутся из кэша; HEAT_RESULT_CACHE_DIR включает хранение на диске
+        self.result_cache = cache.ResultCache(directory=os.environ.get('HEAT_RESULT_CACHE_DIR'))
+        self.request_id = 0
+        self.pending = None
+        self.cancel_event = None
         self.view = View(root_tk, self)
+        self.root.protocol('WM_DELETE_WINDOW', self.on_close)
         self.default_values = {'N': 6, 'K':'N', 'E' : 0.01, 'p': 'r', 'r':0,'x':150} 
         self.colors = ['red','blue','black','green','yellow','orange','purple']
         self.color_id = 0
@@ -50,9 +106,8 @@ class Controller:
         """
         Инициализирует поля ввода и рисует график на холсте.
         """
-        summodel = model.SumModel()
         if (self.default_values['K']=='E'):
-            self.default_values['N'] = summodel.calculate_number_of_iterations(self.default_values['E'],self.default_values['r'])
+            self.default_values['N'] = self.updateN(self.default_values['E'],self.default_values['r'])
         #else:
         #    self.default_values['E'] = summodel.calculate_eps_of_iterations(self.default_values['N'],self.default_values['r'])
         self.default_values['p'] = self.view.get_type()
@@ -61,35 +116,124 @@ class Controller:
 
     def update_view(self, values: dict):
         """
-        Запрашивает x и y для отрисовки графика из модели, и обновляет график в View новыми данными
+        Запрашивает x и y для отрисовки графика из модели в фоновом потоке.
+        График в View обновится, когда расчёт закончится (см. poll_plot_data)
 
         :param values: значения для графика
         """
-        self.get_plot_data(values)
+        if self.pending is not None:
+            # ещё не начатый расчёт снимается с очереди, начатый - прерывается между блоками
+            self.pending.cancel()
+            self.cancel_event.set()
+        self.request_id += 1
+        self.cancel_event = threading.Event()
+        self.pending = self.executor.submit(self.compute_plot_data, dict(values), self.cancel_event)
+        self.view.show_progress(True)
+        self.root.after(POLL_MS, self.poll_plot_data, self.request_id, self.pending)
+
+    def poll_plot_data(self, request_id: int, future):
+        """
+        Проверяет, закончился ли фоновый расчёт, и рисует его результат.
+        Вызывается из цикла событий Tk.
+
+        :param request_id: номер запроса, которому принадлежит future
+        :param future: concurrent.futures.Future с результатом compute_plot_data
+        """
+        if request_id != self.request_id:
+            # запрос устарел - опросом занимается более новый запрос
+            return
+        if not future.done():
+            self.root.after(POLL_MS, self.poll_plot_data, request_id, future)
+            return
+        self.pending = None
+        self.view.show_progress(False)
+        try:
+            self.lbl, self.plot_data, self.plot_params = future.result()
+        except Exception as error:
+            logger.exception("ошибка расчёта графика")
+            self.view.show_status('Ошибка расчёта: %s' % error)
+            return
         self.update_view_plot()
 
+    def on_close(self):
+        """
+        Закрывает окно: прерывает текущий расчёт, снимает с очереди остальные и останавливает пул потоков,
+        не дожидаясь прерванного расчёта.
+        """
+        if self.cancel_event is not None:
+            self.cancel_event.set()
+        self.pending = None
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.root.destroy()
+
     def get_plot_data(self, values: dict):
         """
         Отправляет данные в модель и сохраняет данные, которые модель вернула.
 
         :param values: словарь с данным от модели
         """
-        summodel = model.SumModel()
-        if (values['K']=='E'):
-            values['N'] = summodel.calculate_number_of_iterations(values['E'],values['r'])
-        #else:
-        #    values['E'] = summodel.calculate_eps_of_iterations(values['N'],values['r'])
-        self.lbl = str("N=" + str(values['N']) +" " +str(values['p'])+ "="+str(values['r']))
-        self.plot_data = summodel.generate_w_data(values['N'],values['r'],values['p'],values['x'],values["E"])
+        self.lbl, self.plot_data, self.plot_params = self.compute_plot_data(values)
+
+    def compute_plot_data(self, values: dict, cancel=None):
+        """
+        Считает данные для графика. Не обращается к Tk, поэтому может выполняться в фоновом потоке.
+
+        :param values: словарь с данным от модели; при K='E' в values['N'] уже записан N, подобранный по E
+            (View.update_values, initialize_view), и второй раз он не подбирается
+        :param cancel: threading.Event отмены запроса; если оно установлено, расчёт прерывается исключением
+            model.Cancelled
+
+        :return кортеж (подпись графика, (x, y), параметры расчёта), а для семейства -
+            (список подписей, (x, w), параметры расчёта), где строка w[i] - график для values['r'][i]
+        """
+        with profiling.span('Controller.get_plot_data') as span:
+            summodel = self.model
+            family = isinstance(values['r'], (tuple, list))
+            if family:
+                lbl = [curve_label(values['N'], values['p'], r) for r in values['r']]
+            else:
+                lbl = curve_label(values['N'], values['p'], values['r'])
+            params = dict(summodel.constants(), **values)
+            key = curve_key(params)
+            hits = self.result_cache.hits
+            if family:
+                compute = lambda: summodel.generate_w_family(values['N'],values['r'],values['p'],values['x'],
+                                                           cancel=cancel)
+            else:
+                compute = lambda: summodel.generate_w_data(values['N'],values['r'],values['p'],values['x'],values["E"],
+                                                         cancel=cancel)
+            data = self.result_cache.get_or_compute(key, compute)
+            span.set(terms=values['N'], points=len(data[0]), cache_hit=self.result_cache.hits > hits)
+        return lbl, data, params
 
 
     def updateN(self, eps, t):
-        summodel = model.SumModel()
-        return summodel.calculate_number_of_iterations(eps,t)
+        if isinstance(t, (tuple, list)):
+            # для семейства графиков - N, которого хватает каждому из них
+            return max(self.model.calculate_number_of_iterations(eps, value) for value in t)
+        return self.model.calculate_number_of_iterations(eps,t)
 
     def updateEps(self, N, t):
-        summodel = model.SumModel()
-        return summodel.calculate_eps_of_iterations(N,t)
+        return self.model.calculate_eps_of_iterations(N,t)
+
+    def set_constants(self, **constants):
+        """
+        Заменяет модель новой с изменёнными константами (R, l, alpha, k, c ...).
+        Закэшированные графики хранятся по константам модели, поэтому старые записи
+        просто перестают совпадать; clear_cache() освобождает занятую ими память.
+
+        :param constants: константы SumModel, которые нужно изменить
+        """
+        constants = dict(self.model.constants(), **constants)
+        constants.pop('psi', None)
+        self.model = model.SumModel(backend=self.model.backend, psi=self.model.psi,
+                                    precision=self.model.precision, **constants)
+
+    def clear_cache(self):
+        """
+        Очищает кэш посчитанных графиков
+        """
+        self.result_cache.clear()
 
     def update_view_plot(self):
         """
@@ -97,8 +241,86 @@ class Controller:
         использует копию данных для отрисовки от контроллера.
         """
         #self.view.canvas.clear()
-        self.view.canvas.plot(self.plot_data[0],self.plot_data[1],color=self.get_current_color(),label = self.lbl)
-        self.color_id += 1
+        if isinstance(self.lbl, list):
+            curves = []
+            for lbl, r, w in zip(self.lbl, self.plot_params['r'], self.plot_data[1]):
+                curves.append(export.Curve(lbl, self.plot_data[0], w, self.get_current_color(),
+                                           dict(self.plot_params, r=r)))
+                self.color_id += 1
+            self.view.canvas.plot_many([(curve.x, curve.y, curve.color, curve.label, curve_key(curve.params))
+                                        for curve in curves])
+        else:
+            curves = [export.Curve(self.lbl, self.plot_data[0], self.plot_data[1], self.get_current_color(),
+                                   self.plot_params)]
+            self.view.canvas.plot(self.plot_data[0],self.plot_data[1],color=self.get_current_color(),label = self.lbl,
+                                  key=curve_key(self.plot_params))
+            self.color_id += 1
+        self.record_curves(curves)
+        self.update_status()
+
+    def export_session(self, path, append=False):
+        """
+        Сохраняет все нарисованные за сессию графики с параметрами расчёта (см. models/export.py)
+
+        :param path: путь к файлу .npz, .h5/.hdf5 или .arrow/.feather
+        :param append: дописать графики к уже сохранённым в файле
+        """
+        export.save_curves(path, self.session, append=append)
+
+    def load_session(self, path):
+        """
+        Рисует сохранённые графики одной перерисовкой холста, не пересчитывая ряд,
+        и добавляет их в текущую сессию (уже нарисованные графики с теми же параметрами не повторяются).
+
+        :param path: путь к файлу, записанному export_session
+        """
+        curves = export.load_curves(path)
+        self.view.canvas.plot_many([(curve.x, curve.y, curve.color, curve.label, curve_key(curve.params))
+                                    for curve in curves])
+        self.record_curves(curves)
+
+    def record_curves(self, curves):
+        """
+        Записывает нарисованные графики в session. Повторный график с тем же ключом curve_key только меняет данные
+        существующей линии (MPLgraph.plot), поэтому заменяет её запись, а цвет берётся у линии на холсте.
+
+        :param curves: список export.Curve
+        """
+        index = {curve_key(curve.params): i for i, curve in enumerate(self.session)}
+        for curve in curves:
+            key = curve_key(curve.params)
+            line = self.view.canvas.lines.get(key)
+            if line is not None:
+                curve = curve._replace(color=line.get_color())
+            if key in index:
+                self.session[index[key]] = curve
+            else:
+                index[key] = len(self.session)
+                self.session.append(curve)
+
+    def clear_session(self):
+        """
+        Забывает нарисованные графики; вызывается представлением при очистке холста
+        """
+        self.session = []
+
+    def update_status(self):
+        """
+        Показывает в строке состояния View время последних этапов, если замеры пишутся в RingBufferSink.
+        """
+        sink = profiling.get_sink()
+        if not isinstance(sink, profiling.RingBufferSink):
+            return
+        parts = []
+        for names in (('Controller.get_plot_data',), ('SumModel.generate_w_data', 'SumModel.generate_w_family'),
+                      ('MPLgraph.plot', 'MPLgraph.plot_many')):
+            record = sink.last(names)
+            if record is not None:
+                part = '%s %.1f ms' % (record['name'].split('.')[-1], record['seconds'] * 1000)
+                if record.get('cache_hit'):
+                    part += ' (cache)'
+                parts.append(part)
+        self.view.show_status(', '.join(parts))
 
 
 if __name__ == '__main__':
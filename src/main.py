@@ -1,7 +1,10 @@
+import logging
+import os
 import tkinter as tk
 from controllers.controller import Controller
 
 if __name__ == "__main__":
+    logging.basicConfig(level=os.environ.get('HEAT_LOG_LEVEL', 'WARNING'))
     root = tk.Tk()
     app = Controller(root)
     root.mainloop()
@@ -0,0 +1,94 @@
+"""
+Пакетный расчёт функции w(r, t) для множества наборов параметров
+Содержит:
+* parameter_grid - функция, которая строит все комбинации значений параметров.
+* sweep - функция, которая считает generate_w_data для каждого набора параметров в пуле процессов.
+"""
+
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .model import SumModel, bessel_zeros
+
+# параметры конструктора SumModel, которые можно задать в наборе параметров
+MODEL_KEYS = ('R', 'l', 'u_c', 'u_b', 'alpha', 'T', 'k', 'c')
+# число частей на один процесс: несколько частей выравнивают нагрузку, если наборы считаются разное время
+_CHUNKS_PER_WORKER = 4
+
+
+def parameter_grid(**axes) -> list:
+    """
+    Строит список наборов параметров из всех комбинаций значений
+
+    :param axes: имя параметра -> список значений, например N=[10, 100], r=[0, 1, 2]
+
+    :return список словарей с параметрами
+    """
+    names = list(axes)
+    return [dict(zip(names, values)) for values in itertools.product(*(axes[name] for name in names))]
+
+
+def _compute(params: dict):
+    model = SumModel(**{key: params[key] for key in MODEL_KEYS if key in params})
+    if params.get('K', 'N') == 'E':
+        n = model.calculate_number_of_iterations(params['E'], params['r'])
+    else:
+        n = params['N']
+    return model.generate_w_data(n, params['r'], params.get('p', 'r'), params['x'], params.get('E', 0))
+
+
+def _compute_chunk(chunk: list) -> list:
+    return [_compute(params) for params in chunk]
+
+
+def _init_worker(zeros: np.ndarray):
+    """
+    Передаёт процессу уже посчитанную таблицу нулей функции Бесселя
+    """
+    bessel_zeros.update(zeros)
+
+
+def _iter_results(param_sets: list, workers: int, chunksize: int):
+    if workers <= 1 or len(param_sets) <= 1:
+        for params in param_sets:
+            yield _compute(params)
+        return
+    chunks = [param_sets[i:i + chunksize] for i in range(0, len(param_sets), chunksize)]
+    n_max = max(params.get('N', 1) for params in param_sets)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(np.asarray(bessel_zeros(n_max)),)) as executor:
+        # map сохраняет порядок наборов, поэтому результат не зависит от числа процессов
+        for chunk_result in executor.map(_compute_chunk, chunks):
+            yield from chunk_result
+
+
+def sweep(param_sets, workers=None, chunksize=None, stack=True):
+    """
+    Считает SumModel.generate_w_data для каждого набора параметров.
+    Наборы делятся на части, которые считаются в ProcessPoolExecutor.
+
+    Набор параметров - словарь с ключами как у values контроллера:
+        {'N': n, 'K': 'N' или 'E', 'r': r, 'p': 'r' или 't', 'x': x, 'E': e}
+    и, при необходимости, константами модели из MODEL_KEYS.
+    При K='E' количество элементов ряда подбирается по точности E, как в контроллере.
+
+    :param param_sets: список наборов параметров (например, из parameter_grid)
+    :param workers: количество процессов (по умолчанию - число ядер, 1 - без пула)
+    :param chunksize: количество наборов в одной части (по умолчанию - поровну на _CHUNKS_PER_WORKER частей на процесс)
+    :param stack: вернуть сложенные массивы, иначе - генератор пар (ox, w) в порядке наборов
+
+    :return кортеж (ox, w) массивов формы (len(param_sets), число точек) или генератор
+    """
+    param_sets = list(param_sets)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if chunksize is None:
+        chunksize = max(1, -(-len(param_sets) // (workers * _CHUNKS_PER_WORKER)))
+    results = _iter_results(param_sets, workers, chunksize)
+    if not stack:
+        return results
+    results = list(results)
+    return np.stack([ox for ox, w in results]), np.stack([w for ox, w in results])
@@ -0,0 +1,200 @@
+"""
+Кэш результатов расчёта модели
+Содержит:
+* make_key - функция, которая строит ключ кэша по словарю параметров.
+* ResultCache - ограниченный по памяти LRU-кэш массивов с необязательным хранением на диске.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from numbers import Number
+
+import numpy as np
+
+# ограничение памяти кэша по умолчанию, байт
+DEFAULT_MAX_BYTES = 64 * 2 ** 20
+
+
+def _normalize(value):
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, Number):
+        # 6 и 6.0 из разных полей ввода должны давать один и тот же ключ
+        return float(value)
+    if isinstance(value, (list, tuple)):
+        return [_normalize(item) for item in value]
+    return str(value)
+
+
+def make_key(params: dict) -> str:
+    """
+    Строит ключ кэша по параметрам расчёта. Числа приводятся к float, порядок ключей не важен,
+    поэтому ключ одинаков между сессиями и может использоваться как имя файла.
+
+    :param params: словарь параметров (значения из view и константы модели)
+
+    :return строка-ключ (sha1 от нормализованных параметров)
+    """
+    normalized = {str(name): _normalize(value) for name, value in params.items()}
+    return hashlib.sha1(json.dumps(normalized, sort_keys=True).encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    LRU-кэш кортежей numpy массивов (например, (x, y) из SumModel.generate_w_data).
+    Старые записи вытесняются, когда суммарный размер массивов превышает max_bytes.
+    Если задан directory, записи дополнительно сохраняются в .npz файлы и подгружаются
+    оттуда при промахе в памяти, так что новая сессия начинает с тёплым кэшем.
+    Каталог тоже ограничен по размеру: после записи удаляются файлы, к которым дольше всего
+    не обращались (по времени изменения, которое обновляется при чтении).
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, directory=None, disk_max_bytes=None):
+        """
+        :param max_bytes: ограничение суммарного размера массивов в памяти, байт
+        :param directory: каталог для .npz файлов или None
+        :param disk_max_bytes: ограничение суммарного размера .npz файлов в каталоге, байт
+            (по умолчанию - max_bytes)
+        """
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.disk_max_bytes = max_bytes if disk_max_bytes is None else disk_max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.npz')
+
+    def get(self, key: str):
+        """
+        :param key: ключ из make_key
+
+        :return сохранённый кортеж массивов или None
+        """
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+        value = self._load(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.disk_hits += 1
+            self._store(key, value)
+        return value
+
+    def put(self, key: str, value: tuple):
+        """
+        Сохраняет результат в кэш (и на диск, если задан directory)
+
+        :param key: ключ из make_key
+        :param value: кортеж numpy массивов
+        """
+        value = tuple(np.asarray(array) for array in value)
+        for array in value:
+            array.setflags(write=False)
+        with self._lock:
+            self._store(key, value)
+        if self.directory is not None:
+            np.savez(self._path(key), *value)
+            self._trim_directory()
+
+    def get_or_compute(self, key: str, compute):
+        """
+        :param key: ключ из make_key
+        :param compute: функция без аргументов, которая считает результат при промахе
+
+        :return результат из кэша или только что посчитанный
+        """
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def stats(self) -> dict:
+        """
+        :return словарь со счётчиками попаданий/промахов и занятой памятью
+        """
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'disk_hits': self.disk_hits,
+                    'entries': len(self._entries), 'nbytes': self.nbytes}
+
+    def clear(self):
+        """
+        Очищает кэш в памяти (файлы на диске остаются)
+        """
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def _store(self, key, value):
+        if key in self._entries:
+            self.nbytes -= sum(array.nbytes for array in self._entries.pop(key))
+        size = sum(array.nbytes for array in value)
+        if size > self.max_bytes:
+            return
+        self._entries[key] = value
+        self.nbytes += size
+        while self.nbytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.nbytes -= sum(array.nbytes for array in evicted)
+
+    def _load(self, key):
+        if self.directory is None or not os.path.exists(self._path(key)):
+            return None
+        try:
+            with np.load(self._path(key)) as data:
+                value = tuple(data['arr_%d' % i] for i in range(len(data.files)))
+        except (OSError, ValueError, KeyError):
+            return None
+        for array in value:
+            array.setflags(write=False)
+        try:
+            # чтение - обращение к записи: файл становится самым свежим для _trim_directory
+            os.utime(self._path(key))
+        except OSError:
+            pass
+        return value
+
+    def _trim_directory(self):
+        """
+        Удаляет самые давние по времени изменения .npz файлы, пока каталог не уложится в disk_max_bytes.
+        Каталог может использоваться несколькими процессами, поэтому пропавшие файлы пропускаются.
+        """
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.npz'):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.disk_max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
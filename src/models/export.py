@@ -0,0 +1,171 @@
+"""
+Сохранение посчитанных графиков вместе с параметрами расчёта
+Содержит:
+* Curve - один график: подпись, массивы x и y, цвет и параметры расчёта.
+* save_curves - функция, которая записывает графики в .npz, HDF5 или Arrow файл (с дописыванием).
+* load_curves - функция, которая читает графики из такого файла.
+
+Формат определяется по расширению:
+* .npz - zip-архив со сжатием deflate: для графика i массивы "i/x", "i/y" и "i/meta" (JSON с подписью,
+  цветом и параметрами). Дописывание добавляет новые элементы в архив, не переписывая старые.
+* .h5, .hdf5 - группа curves/i с наборами данных x и y (блочное хранение, gzip) и атрибутами
+  label, color, params; требует пакет h5py.
+* .arrow, .feather - таблица Arrow IPC (сжатие zstd) со столбцами label, color, params, x, y;
+  каждый вызов save_curves добавляет отдельный блок записей (record batch), но файл IPC при дописывании
+  переписывается целиком; требует пакет pyarrow.
+"""
+
+import json
+import os
+import zipfile
+from collections import namedtuple
+
+import numpy as np
+
+# params - словарь параметров расчёта (константы модели и values контроллера)
+Curve = namedtuple('Curve', 'label x y color params')
+
+# ширина номера графика в именах элементов архива и групп HDF5
+_INDEX_WIDTH = 6
+
+
+def _dumps(params: dict) -> str:
+    return json.dumps(params, sort_keys=True, default=float)
+
+
+def _format(path) -> str:
+    extension = os.path.splitext(str(path))[1].lower()
+    if extension == '.npz':
+        return 'npz'
+    if extension in ('.h5', '.hdf5'):
+        return 'hdf5'
+    if extension in ('.arrow', '.feather'):
+        return 'arrow'
+    raise ValueError("неизвестный формат файла графиков: %s (.npz, .h5, .hdf5, .arrow, .feather)" % path)
+
+
+def _import_h5py():
+    try:
+        import h5py
+    except ImportError:
+        raise ImportError('для файлов HDF5 нужен пакет h5py') from None
+    return h5py
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+    except ImportError:
+        raise ImportError('для файлов Arrow нужен пакет pyarrow') from None
+    return pyarrow
+
+
+def save_curves(path, curves, append=False):
+    """
+    Записывает графики в файл одним проходом
+
+    :param path: путь к файлу .npz, .h5/.hdf5 или .arrow/.feather
+    :param curves: список Curve
+    :param append: дописать графики к уже записанным в файле (если файла нет, он создаётся)
+    """
+    curves = list(curves)
+    append = append and os.path.exists(path)
+    {'npz': _save_npz, 'hdf5': _save_hdf5, 'arrow': _save_arrow}[_format(path)](path, curves, append)
+
+
+def load_curves(path) -> list:
+    """
+    Читает графики из файла, записанного save_curves
+
+    :param path: путь к файлу
+
+    :return список Curve в порядке записи
+    """
+    return {'npz': _load_npz, 'hdf5': _load_hdf5, 'arrow': _load_arrow}[_format(path)](path)
+
+
+def _save_npz(path, curves, append):
+    with zipfile.ZipFile(path, 'a' if append else 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        start = sum(1 for name in archive.namelist() if name.endswith('/meta.npy'))
+        for index, curve in enumerate(curves, start):
+            meta = _dumps({'label': curve.label, 'color': curve.color, 'params': curve.params})
+            for name, array in (('x', curve.x), ('y', curve.y), ('meta', np.array(meta))):
+                with archive.open('%0*d/%s.npy' % (_INDEX_WIDTH, index, name), 'w', force_zip64=True) as f:
+                    np.lib.format.write_array(f, np.asarray(array), allow_pickle=False)
+
+
+def _load_npz(path):
+    curves = []
+    with np.load(path, allow_pickle=False) as data:
+        for prefix in sorted(name[:-len('/meta')] for name in data.files if name.endswith('/meta')):
+            meta = json.loads(str(data[prefix + '/meta']))
+            curves.append(Curve(meta['label'], data[prefix + '/x'], data[prefix + '/y'], meta['color'], meta['params']))
+    return curves
+
+
+def _save_hdf5(path, curves, append):
+    h5py = _import_h5py()
+    with h5py.File(path, 'a' if append else 'w') as f:
+        group = f.require_group('curves')
+        start = len(group)
+        for index, curve in enumerate(curves, start):
+            item = group.create_group('%0*d' % (_INDEX_WIDTH, index))
+            for name, array in (('x', curve.x), ('y', curve.y)):
+                item.create_dataset(name, data=np.asarray(array), chunks=True, compression='gzip', shuffle=True)
+            item.attrs['label'] = curve.label
+            item.attrs['color'] = curve.color
+            item.attrs['params'] = _dumps(curve.params)
+
+
+def _load_hdf5(path):
+    h5py = _import_h5py()
+    with h5py.File(path, 'r') as f:
+        group = f['curves']
+        return [Curve(str(item.attrs['label']), item['x'][()], item['y'][()], str(item.attrs['color']),
+                      json.loads(item.attrs['params']))
+                for item in (group[name] for name in sorted(group))]
+
+
+def _save_arrow(path, curves, append):
+    pa = _import_pyarrow()
+    batches = []
+    if append:
+        # файл читается в память целиком (не через отображение), поэтому его можно перезаписать
+        with pa.OSFile(str(path), 'rb') as source:
+            batches = pa.ipc.open_file(source).read_all().to_batches()
+    if curves:
+        batches.append(pa.RecordBatch.from_pydict({
+            'label': [curve.label for curve in curves],
+            'color': [curve.color for curve in curves],
+            'params': [_dumps(curve.params) for curve in curves],
+            'x': [np.asarray(curve.x, dtype=float) for curve in curves],
+            'y': [np.asarray(curve.y, dtype=float) for curve in curves],
+        }))
+    schema = batches[0].schema if batches else pa.schema([('label', pa.string()), ('color', pa.string()),
+                                                          ('params', pa.string()), ('x', pa.list_(pa.float64())),
+                                                          ('y', pa.list_(pa.float64()))])
+    options = pa.ipc.IpcWriteOptions(compression='zstd')
+    with pa.OSFile(str(path), 'wb') as sink, pa.ipc.new_file(sink, schema, options=options) as writer:
+        for batch in batches:
+            writer.write_batch(batch)
+
+
+def _split_lists(column) -> list:
+    """
+    Делит столбец списков Arrow на массивы numpy без поэлементного перевода в объекты Python
+    """
+    column = column.combine_chunks()
+    values = column.flatten().to_numpy()
+    offsets = column.offsets.to_numpy()
+    return [values[start - offsets[0]:stop - offsets[0]] for start, stop in zip(offsets[:-1], offsets[1:])]
+
+
+def _load_arrow(path):
+    pa = _import_pyarrow()
+    with pa.OSFile(str(path), 'rb') as source:
+        table = pa.ipc.open_file(source).read_all()
+    return [Curve(label, x, y, color, json.loads(params))
+            for label, color, params, x, y in zip(table.column('label').to_pylist(), table.column('color').to_pylist(),
+                                                  table.column('params').to_pylist(),
+                                                  _split_lists(table.column('x')), _split_lists(table.column('y')))]
@@ -0,0 +1,185 @@
+"""
+Подбор констант материала по измеренным кривым температуры
+Содержит:
+* series_gradient - функция, которая считает w(r, t) и аналитические производные по k, c и alpha.
+* fit_constants - функция, которая подбирает k и alpha для множества датчиков методом Левенберга - Марквардта.
+* FitResult - результат подбора.
+
+От констант зависят только скорости затухания rate[n] = k/c·(μn/R)² + 2α/(l·c),
+поэтому пространственные множители coef[n]·J0(μn·r/R) датчика считаются один раз на весь подбор.
+w зависит только от отношений k/c и α/c, поэтому (k, c, alpha) по кривым неразличимы:
+c фиксируется (берётся из модели), а подбираются k и alpha.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+from scipy.special import j0
+
+from .model import _BLOCK_ELEMENTS, SumModel, bessel_zeros
+
+# результат подбора: массивы формы (число датчиков,)
+FitResult = namedtuple('FitResult', 'k alpha c cost iterations converged')
+
+# во сколько раз меняется затухание шага Левенберга - Марквардта при неудачном / удачном шаге
+_DAMPING_FACTOR = 10.0
+_DAMPING_MIN = 1e-12
+_DAMPING_MAX = 1e12
+# наибольший шаг по log k и log alpha за итерацию
+_MAX_LOG_STEP = 1.0
+
+
+def _spatial_factors(model: SumModel, r: np.ndarray, N: int) -> np.ndarray:
+    """
+    Пространственные множители coef[n]·J0(μn·r/R) формы (len(r), N)
+    """
+    coef, _ = model.term_tables(N)
+    return coef * j0(np.multiply.outer(r, bessel_zeros(N)) / model.R)
+
+
+def series_gradient(model: SumModel, r, t, N: int):
+    """
+    Считает w(r, t) и производные по константам модели:
+        dw/dθ = -Σ coef[n]·J0(μn·r/R)·exp(-rate[n]·t)·t·drate[n]/dθ,
+    где drate/dk = (μn/R)²/c, drate/dalpha = 2/(l·c), drate/dc = -rate/c.
+
+    :param model: модель с текущими константами
+    :param r: аргумент функции w (число или массив)
+    :param t: аргумент функции w (число или массив)
+    :param N: количество элементов ряда
+
+    :return кортеж (w, {'k': dw/dk, 'alpha': dw/dalpha, 'c': dw/dc}) массивов формы broadcast(r, t)
+    """
+    r, t = np.broadcast_arrays(np.asarray(r, dtype=float), np.asarray(t, dtype=float))
+    _, rate = model.term_tables(N)
+    mu = bessel_zeros(N)
+    terms = _spatial_factors(model, r.ravel(), N) * np.exp(-np.multiply.outer(t.ravel(), rate))
+    weighted = -t.reshape(-1, 1) * terms
+    drate = {'k': (mu / model.R) ** 2 / model.c,
+             'alpha': np.full(N, 2 / (model.l * model.c)),
+             'c': -rate / model.c}
+    gradient = {name: (weighted @ value).reshape(r.shape) for name, value in drate.items()}
+    return terms.sum(axis=1).reshape(r.shape), gradient
+
+
+def _residuals(spatial, t, w, log_k, log_alpha, scale_k, scale_alpha, with_jacobian):
+    """
+    Невязки (и якобиан по log k, log alpha) для всех датчиков сразу.
+    spatial: (S, N), t и w: (S, T), log_k и log_alpha: (S,).
+    Слагаемые (задачи × T × N) считаются блоками задач не больше _BLOCK_ELEMENTS элементов,
+    чтобы память не росла с числом датчиков и начальных точек.
+    """
+    count, points = w.shape
+    rate_k = np.exp(log_k)[:, None] * scale_k
+    rate_alpha = np.exp(log_alpha)[:, None] * scale_alpha
+    residual = np.empty(w.shape)
+    jacobian = np.empty(w.shape + (2,)) if with_jacobian else None
+    block = max(1, _BLOCK_ELEMENTS // (points * spatial.shape[1]))
+    for start in range(0, count, block):
+        part = slice(start, start + block)
+        terms = spatial[part, None, :] * np.exp(-(rate_k[part] + rate_alpha[part])[:, None, :] * t[part, :, None])
+        values = terms.sum(axis=2)
+        residual[part] = values - w[part]
+        if with_jacobian:
+            jacobian[part, :, 0] = -t[part] * np.einsum('stn,sn->st', terms, rate_k[part])
+            jacobian[part, :, 1] = -t[part] * values * rate_alpha[part]
+    return residual, jacobian
+
+
+def _levenberg_marquardt(spatial, t, w, log_k, log_alpha, scale_k, scale_alpha, max_iter, tol):
+    """
+    Векторизованный метод Левенберга - Марквардта: у каждой задачи своё затухание,
+    шаги принимаются или отклоняются независимо, а считаются только ещё не сошедшиеся задачи.
+    Системы 2×2 решаются одним вызовом np.linalg.solve.
+    """
+    count = len(log_k)
+    log_k, log_alpha = log_k.copy(), log_alpha.copy()
+    damping = np.full(count, 1e-3)
+    iterations = np.zeros(count, dtype=int)
+    converged = np.zeros(count, dtype=bool)
+    residual, jacobian = _residuals(spatial, t, w, log_k, log_alpha, scale_k, scale_alpha, True)
+    cost = 0.5 * np.sum(residual ** 2, axis=1)
+    for _ in range(max_iter):
+        active = np.flatnonzero(~converged)
+        if not len(active):
+            break
+        iterations[active] += 1
+        jac = jacobian[active]
+        jtj = np.einsum('sti,stj->sij', jac, jac)
+        gradient = np.einsum('sti,st->si', jac, residual[active])
+        diagonal = np.einsum('sii->si', jtj)
+        system = jtj + (damping[active, None] * np.maximum(diagonal, _DAMPING_MIN))[:, :, None] * np.eye(2)
+        step = -np.linalg.solve(system, gradient[:, :, None])[:, :, 0]
+        # шаг в логарифмах ограничен, чтобы далёкая начальная точка не уводила скорости затухания в переполнение
+        length = np.max(np.abs(step), axis=1)
+        step *= np.minimum(1, _MAX_LOG_STEP / np.maximum(length, np.finfo(float).tiny))[:, None]
+        trial_k, trial_alpha = log_k[active] + step[:, 0], log_alpha[active] + step[:, 1]
+        trial_residual, trial_jacobian = _residuals(spatial[active], t[active], w[active], trial_k, trial_alpha,
+                                                    scale_k, scale_alpha, True)
+        trial_cost = 0.5 * np.sum(trial_residual ** 2, axis=1)
+        accept = trial_cost < cost[active]
+        small_change = accept & (cost[active] - trial_cost <= tol * cost[active])
+
+        taken = active[accept]
+        log_k[taken] = trial_k[accept]
+        log_alpha[taken] = trial_alpha[accept]
+        residual[taken] = trial_residual[accept]
+        jacobian[taken] = trial_jacobian[accept]
+        cost[taken] = trial_cost[accept]
+        damping[active] = np.clip(np.where(accept, damping[active] / _DAMPING_FACTOR,
+                                           damping[active] * _DAMPING_FACTOR), _DAMPING_MIN, _DAMPING_MAX)
+        converged[active] = (length < tol) | small_change | (cost[active] == 0)
+    return log_k, log_alpha, cost, iterations, converged
+
+
+def fit_constants(r, t, w, model=None, N=100, starts=1, spread=10.0, seed=0, max_iter=100, tol=1e-10) -> FitResult:
+    """
+    Подбирает k и alpha по измеренным кривым w(t) датчиков, стоящих на радиусах r.
+    Все датчики (и все начальные точки) подбираются одновременно: невязки и якобиан
+    считаются для массива задач, пространственные множители датчиков - один раз.
+    Подбор идёт по log k и log alpha, поэтому найденные константы положительны.
+
+    :param r: радиусы датчиков, массив формы (S,)
+    :param t: моменты измерений, массив формы (T,) (общий для всех датчиков) или (S, T)
+    :param w: измеренные значения, массив формы (S, T)
+    :param model: модель с остальными константами (R, l, c, psi) и начальным приближением k, alpha
+        (по умолчанию - SumModel())
+    :param N: количество элементов ряда
+    :param starts: количество начальных точек на датчик: первая - (model.k, model.alpha),
+        остальные - случайные в пределах spread раз от неё (логарифмически равномерно)
+    :param spread: во сколько раз начальные точки могут отличаться от приближения модели
+    :param seed: зерно генератора начальных точек
+    :param max_iter: наибольшее число итераций
+    :param tol: порог остановки по шагу (в логарифмах констант) и по относительному уменьшению невязки
+
+    :return FitResult с массивами k, alpha, c, cost (половина суммы квадратов невязок),
+        iterations и converged формы (S,) - лучшая из начальных точек для каждого датчика
+    """
+    if model is None:
+        model = SumModel()
+    r = np.atleast_1d(np.asarray(r, dtype=float))
+    w = np.asarray(w, dtype=float).reshape(len(r), -1)
+    t = np.broadcast_to(np.asarray(t, dtype=float), w.shape)
+    if starts < 1:
+        raise ValueError("starts должен быть не меньше 1, получено %r" % starts)
+
+    spatial = _spatial_factors(model, r, N)
+    mu = bessel_zeros(N)
+    scale_k = (mu / model.R) ** 2 / model.c
+    scale_alpha = 2 / (model.l * model.c)
+
+    log_k0 = np.full(starts, np.log(model.k))
+    log_alpha0 = np.full(starts, np.log(model.alpha))
+    if starts > 1:
+        offsets = np.random.default_rng(seed).uniform(-np.log(spread), np.log(spread), size=(starts - 1, 2))
+        log_k0[1:] += offsets[:, 0]
+        log_alpha0[1:] += offsets[:, 1]
+
+    # задачи упорядочены как (начальная точка, датчик)
+    sensors = len(r)
+    log_k, log_alpha, cost, iterations, converged = _levenberg_marquardt(
+        np.tile(spatial, (starts, 1)), np.tile(t, (starts, 1)), np.tile(w, (starts, 1)),
+        np.repeat(log_k0, sensors), np.repeat(log_alpha0, sensors), scale_k, scale_alpha, max_iter, tol)
+    best = np.argmin(cost.reshape(starts, sensors), axis=0) * sensors + np.arange(sensors)
+    return FitResult(k=np.exp(log_k[best]), alpha=np.exp(log_alpha[best]), c=np.full(sensors, float(model.c)),
+                     cost=cost[best], iterations=iterations[best], converged=converged[best])
@@ -0,0 +1,119 @@
+"""
+Скомпилированные (numba) ядра для подсчёта суммы ряда
+Содержит:
+* AVAILABLE - установлен ли numba.
+* j0 - функция Бесселя J0 без scipy (точность ~1e-14), пригодная для numba.
+* sum_series - ядро подсчёта w в массиве точек, параллельное по точкам.
+
+Если numba не установлен, функции остаются обычными функциями Python (медленными, но правильными),
+а SumModel переключается на backend 'numpy'.
+"""
+
+import math
+
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+AVAILABLE = numba is not None
+prange = numba.prange if AVAILABLE else range
+
+# до этого аргумента J0 считается степенным рядом, дальше - обратной рекурсией Миллера
+_SERIES_LIMIT = 8.0
+# начиная с этого аргумента используется асимптотическое разложение Ганкеля
+_ASYMPTOTIC_LIMIT = 25.0
+# запас порядков при старте рекурсии Миллера
+_MILLER_EXTRA = 40
+
+
+def _jit(**options):
+    def decorate(function):
+        if not AVAILABLE:
+            return function
+        # записи дискового кэша numba ссылаются на имя модуля, поэтому kernels везде импортируется
+        # как models.kernels (из каталога src; тесты и замеры добавляют его в sys.path)
+        return numba.njit(cache=True, **options)(function)
+    return decorate
+
+
+@_jit()
+def j0(x):
+    """
+    Функция Бесселя первого рода нулевого порядка
+
+    :param x: аргумент (float)
+
+    :return J0(x)
+    """
+    x = abs(x)
+    if x < _SERIES_LIMIT:
+        # J0(x) = sum (-x²/4)^k / (k!)²
+        q = -x * x / 4
+        term = 1.0
+        result = 1.0
+        k = 1
+        while abs(term) > 1e-17 * abs(result) or k < 3:
+            term *= q / (k * k)
+            result += term
+            k += 1
+        return result
+    if x < _ASYMPTOTIC_LIMIT:
+        # обратная рекурсия J(k-1) = 2k/x·J(k) - J(k+1) с нормировкой J0 + 2·sum J(2k) = 1
+        m = 2 * ((int(x) + _MILLER_EXTRA) // 2)
+        j_next = 0.0
+        j_current = 1.0
+        norm = 0.0
+        for k in range(m, 0, -1):
+            j_previous = 2 * k / x * j_current - j_next
+            j_next = j_current
+            j_current = j_previous
+            if k - 1 > 0 and (k - 1) % 2 == 0:
+                norm += 2 * j_current
+        return j_current / (j_current + norm)
+    # J0(x) = sqrt(2/(πx))·(P·cos(x - π/4) - Q·sin(x - π/4))
+    p = 0.0
+    q = 0.0
+    a = 1.0
+    power = 1.0
+    for k in range(40):
+        term = a / power
+        if k % 4 == 0:
+            p += term
+        elif k % 4 == 1:
+            q += term
+        elif k % 4 == 2:
+            p -= term
+        else:
+            q -= term
+        if abs(term) < 1e-17:
+            break
+        a *= -((2 * k + 1) ** 2) / (8.0 * (k + 1))
+        power *= x
+    chi = x - math.pi / 4
+    return math.sqrt(2 / (math.pi * x)) * (p * math.cos(chi) - q * math.sin(chi))
+
+
+@_jit(parallel=True)
+def sum_series(r, t, coef, rate, mu, R):
+    """
+    Сумма ряда w(r[i], t[i]) = sum coef[n]·exp(-rate[n]·t[i])·J0(mu[n]·r[i]/R)
+
+    :param r: одномерный массив r
+    :param t: одномерный массив t той же длины
+    :param coef: коэффициенты слагаемых
+    :param rate: скорости затухания слагаемых
+    :param mu: нули функции Бесселя
+    :param R: радиус диска
+
+    :return массив значений w
+    """
+    result = np.empty(r.shape[0])
+    for i in prange(r.shape[0]):
+        acc = 0.0
+        for n in range(coef.shape[0]):
+            acc += coef[n] * math.exp(-rate[n] * t[i]) * j0(mu[n] * r[i] / R)
+        result[i] = acc
+    return result
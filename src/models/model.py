@@ -2,14 +2,61 @@
 Модель - представление данных для программы
 Содержит:
 * generate_exp_data - функция, которая генерирует данные вида (x, y), подходящие для отображения в matplotlib.
+* SumModel - модель, которая считает сумму ряда w(r, t).
+* resolve_backend - функция выбора способа подсчёта суммы ряда.
+* make_grid, refine_grid - функции построения сетки точек графика.
+* bessel_zeros - общая лениво растущая таблица нулей функции Бесселя J0 (экземпляр BesselZeros).
+* Cancelled - исключение, которым прерывается отменённый расчёт.
 """
 
 # !TODO расчёт суммы ряда
 
+import hashlib
+import logging
+import os
+import threading
+import warnings
+from functools import lru_cache
+
 import numpy as np
-from scipy.special import jv, jn_zeros,j1
+from scipy.special import jv, j0, j1
 from numpy import exp
 
+from . import profiling
+
+logger = logging.getLogger(__name__)
+
+# способы подсчёта суммы ряда: поэлементно (эталон), векторизованно в NumPy, скомпилированным ядром numba
+BACKENDS = ('python', 'numpy', 'numba')
+# максимальное число элементов в одном блоке матрицы слагаемых (точки × N)
+_BLOCK_ELEMENTS = 1 << 20
+# минимальный размер таблицы нулей функции Бесселя, таблица растёт степенями двойки
+_MIN_ZEROS = 256
+# количество шагов метода Ньютона после асимптотики Макмагона
+_NEWTON_STEPS = 3
+# количество слагаемых в одном блоке при расчёте с разным числом слагаемых в каждой точке
+_TERM_BLOCK = 64
+# количество узлов квадратуры на одно слагаемое при проекции начального профиля на J0(μn·r/R)
+_QUADRATURE_POINTS_PER_TERM = 16
+# ограничение памяти по умолчанию для блоков поля w(r, t), байт
+_FIELD_MAX_BYTES = 256 * 2 ** 20
+# через сколько блоков потока множители exp(-rate·t) пересчитываются заново, чтобы не копилась ошибка умножений
+_STREAM_REANCHOR = 64
+
+
+class Cancelled(Exception):
+    """
+    Расчёт прерван: установлено событие cancel, переданное в метод SumModel
+    """
+
+
+def _check_cancelled(cancel):
+    """
+    Прерывает расчёт между блоками, если установлено событие отмены (threading.Event или None)
+    """
+    if cancel is not None and cancel.is_set():
+        raise Cancelled()
+
 
 def generate_exp_data(base, exponent):
     x = np.linspace(0, 10, 800)
@@ -17,6 +64,302 @@ def generate_exp_data(base, exponent):
     return x, y
 
 
+def _table_size(n: int) -> int:
+    """
+    Размер таблицы, вмещающей n элементов: степень двойки, не меньше _MIN_ZEROS.
+    """
+    size = _MIN_ZEROS
+    while size < n:
+        size *= 2
+    return size
+
+
+def _j0_zeros(n: np.ndarray) -> np.ndarray:
+    """
+    Считает n-ые положительные нули функции Бесселя J0 по асимптотике Макмагона
+    с уточнением методом Ньютона.
+
+    :param n: массив номеров нулей (начиная с 1)
+
+    :return массив нулей μn
+    """
+    beta = (np.asarray(n, dtype=float) - 0.25) * np.pi
+    b8 = 8 * beta
+    x = beta + 1 / b8 - 124 / (3 * b8 ** 3) + 120928 / (15 * b8 ** 5)
+    for _ in range(_NEWTON_STEPS):
+        x = x + j0(x) / j1(x)
+    return x
+
+
+class BesselZeros:
+    """
+    Общая для всех моделей таблица нулей функции Бесселя J0.
+    Считается лениво и удваивается при запросе большего числа нулей.
+    Если задан cache_path, таблица подгружается из .npy файла (через mmap, поэтому
+    страницы разделяются между процессами) и сохраняется туда после роста.
+    """
+
+    def __init__(self, cache_path=None):
+        """
+        :param cache_path: путь к .npy файлу для хранения таблицы между запусками (или None)
+        """
+        self.cache_path = cache_path
+        self._table = np.empty(0)
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def __call__(self, n: int) -> np.ndarray:
+        """
+        :param n: количество нулей
+
+        :return первые n нулей μ1..μn (массив только для чтения)
+        """
+        if n > len(self._table):
+            with self._lock:
+                if n > len(self._table):
+                    self._grow(n)
+        return self._table[:n]
+
+    def __len__(self):
+        return len(self._table)
+
+    def update(self, table: np.ndarray):
+        """
+        Подменяет таблицу уже посчитанными нулями (например, переданными из другого процесса),
+        если они длиннее текущей таблицы.
+
+        :param table: массив нулей μ1..μm
+        """
+        with self._lock:
+            if len(table) > len(self._table):
+                table = np.asarray(table)
+                table.setflags(write=False)
+                self._table = table
+
+    def _grow(self, n: int):
+        if not self._loaded:
+            self._loaded = True
+            self._load()
+            if n <= len(self._table):
+                return
+        old = len(self._table)
+        table = np.empty(_table_size(n))
+        table[:old] = self._table
+        table[old:] = _j0_zeros(np.arange(old + 1, len(table) + 1))
+        table.setflags(write=False)
+        self._table = table
+        self._save()
+
+    def _load(self):
+        if self.cache_path is None or not os.path.exists(self.cache_path):
+            return
+        try:
+            self._table = np.load(self.cache_path, mmap_mode='r')
+        except (OSError, ValueError):
+            self._table = np.empty(0)
+
+    def _save(self):
+        if self.cache_path is None:
+            return
+        # пишем во временный файл и атомарно подменяем, чтобы параллельные процессы не прочитали половину таблицы
+        tmp_path = "%s.%d.tmp" % (self.cache_path, os.getpid())
+        try:
+            with open(tmp_path, 'wb') as f:
+                np.save(f, np.asarray(self._table))
+            os.replace(tmp_path, self.cache_path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+bessel_zeros = BesselZeros(os.environ.get('HEAT_BESSEL_ZEROS_CACHE'))
+
+
+def resolve_backend(backend=None) -> str:
+    """
+    Выбирает способ подсчёта суммы ряда
+
+    :param backend: один из BACKENDS или None - тогда берётся переменная окружения HEAT_BACKEND
+        (по умолчанию 'numpy'). Если numba не установлен, вместо 'numba' выбирается 'numpy'.
+
+    :return один из BACKENDS
+    """
+    if backend is None:
+        backend = os.environ.get('HEAT_BACKEND', 'numpy')
+    if backend not in BACKENDS:
+        raise ValueError("неизвестный backend %r, допустимые значения: %s" % (backend, ', '.join(BACKENDS)))
+    if backend == 'numba':
+        # numba импортируется только при выборе этого способа: его импорт заметно замедляет запуск
+        from . import kernels
+        if not kernels.AVAILABLE:
+            warnings.warn("numba не установлен, используется backend 'numpy'", RuntimeWarning, stacklevel=3)
+            backend = 'numpy'
+    return backend
+
+
+def _pairwise_sum(terms: np.ndarray) -> np.ndarray:
+    """
+    Попарное суммирование по последней оси: ошибка округления растёт как log2(N), а не как N.
+    """
+    while terms.shape[-1] > 1:
+        half = terms.shape[-1] // 2
+        head = terms[..., :half] + terms[..., half:2 * half]
+        if terms.shape[-1] % 2:
+            head[..., -1] += terms[..., -1]
+        terms = head
+    return terms[..., 0]
+
+
+def make_grid(start: float, stop: float, points: int, spacing='uniform') -> np.ndarray:
+    """
+    Строит сетку точек графика
+
+    :param start: левая граница
+    :param stop: правая граница
+    :param points: количество точек
+    :param spacing: 'uniform' - равномерная сетка, 'log' - геометрическая прогрессия (start > 0)
+
+    :return массив точек
+    """
+    if spacing == 'uniform':
+        return np.linspace(start, stop, points)
+    if spacing == 'log':
+        if start <= 0:
+            raise ValueError("для логарифмической сетки нужна левая граница > 0, получено %r" % start)
+        return np.geomspace(start, stop, points)
+    raise ValueError("неизвестный способ расположения точек: %r" % spacing)
+
+
+def refine_grid(evaluate, start: float, stop: float, points: int):
+    """
+    Строит сетку, сгущающуюся там, где функция сильнее всего изгибается.
+    Начинает с равномерной сетки из points // 4 точек и за каждый проход делит пополам
+    до половины отрезков с наибольшей оценкой ошибки линейной интерполяции |f''|·h²/8,
+    пока не наберётся points точек. Функция считается только в новых точках.
+
+    :param evaluate: функция, которая по массиву точек возвращает массив значений
+    :param start: левая граница
+    :param stop: правая граница
+    :param points: итоговое количество точек
+
+    :return кортеж (x, y) массивов длины points
+    """
+    x = np.linspace(start, stop, min(points, max(3, points // 4)))
+    y = np.asarray(evaluate(x), dtype=float)
+    while len(x) < points:
+        h = np.diff(x)
+        slope = np.diff(y) / h
+        curvature = np.zeros(len(x))
+        curvature[1:-1] = 2 * np.diff(slope) / (h[:-1] + h[1:])
+        error = np.maximum(np.abs(curvature[:-1]), np.abs(curvature[1:])) * h ** 2 / 8
+        count = min(points - len(x), max(1, len(h) // 2))
+        worst = np.argpartition(-error, count - 1)[:count]
+        new_x = x[worst] + h[worst] / 2
+        x = np.concatenate([x, new_x])
+        y = np.concatenate([y, evaluate(new_x)])
+        order = np.argsort(x, kind='stable')
+        x, y = x[order], y[order]
+    return x, y
+
+
+class SampledProfile:
+    """
+    Начальный профиль температуры, заданный значениями в точках (между точками - линейная интерполяция).
+    Сравнивается и хэшируется по содержимому, поэтому одинаковые массивы используют одни и те же
+    закэшированные коэффициенты.
+    """
+
+    def __init__(self, r, values):
+        """
+        :param r: возрастающий массив точек на [0, R]
+        :param values: значения профиля в точках r
+        """
+        self.r = np.array(r, dtype=float)
+        self.values = np.array(values, dtype=float)
+        self.key = hashlib.sha1(self.r.tobytes() + self.values.tobytes()).hexdigest()
+
+    def __call__(self, r):
+        return np.interp(r, self.r, self.values)
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __eq__(self, other):
+        return isinstance(other, SampledProfile) and self.key == other.key
+
+
+def _sample_profile(psi, r: np.ndarray) -> np.ndarray:
+    """
+    Значения профиля в точках r. Функции, которые не принимают массивы
+    (например, config.psi), вызываются поэлементно.
+    """
+    try:
+        values = np.asarray(psi(r), dtype=float)
+        if values.shape == r.shape:
+            return values
+    except (TypeError, ValueError):
+        pass
+    return np.vectorize(psi, otypes=[float])(r)
+
+
+def _profile_key(psi, R) -> str:
+    """
+    Ключ функции-профиля по содержимому: sha1 её значений на сетке квадратуры наименьшей таблицы
+    (см. _profile_coefficients). Имя функции не годится: у лямбд и замыканий одного модуля оно одинаковое.
+    """
+    r = np.linspace(0, R, _QUADRATURE_POINTS_PER_TERM * _MIN_ZEROS + 1)
+    return hashlib.sha1(_sample_profile(psi, r).tobytes()).hexdigest()
+
+
+@lru_cache(maxsize=16)
+def _profile_coefficients(size, R, psi):
+    """
+    Коэффициенты разложения начального профиля psi(r) в ряд по J0(μn·r/R):
+        coef[n] = 2 / (R²·J1(μn)²) · ∫0^R psi(r)·J0(μn·r/R)·r dr.
+    Интеграл считается формулой трапеций сразу для всех n (блоками строк матрицы J0).
+    Кэшируются по (size, R, psi) с вытеснением LRU.
+
+    :param size: длина таблицы (см. _table_size)
+    :param R: радиус диска
+    :param psi: None - ступенька psi = 10 при r <= R/4 (коэффициенты считаются точно:
+        5·J1(μn/4) / (μn·J1(μn)²)), иначе - функция psi(r) или SampledProfile
+
+    :return массив коэффициентов длины size
+    """
+    mu = bessel_zeros(size)
+    if psi is None:
+        coef = (5 * j1(mu / 4)) / (mu * j1(mu) ** 2)
+    else:
+        r = np.linspace(0, R, _QUADRATURE_POINTS_PER_TERM * size + 1)
+        weights = np.full(len(r), r[1] - r[0])
+        weights[[0, -1]] /= 2
+        integrand = _sample_profile(psi, r) * r * weights
+        projection = np.empty(size)
+        rows = max(1, _BLOCK_ELEMENTS // len(r))
+        for start in range(0, size, rows):
+            stop = min(start + rows, size)
+            projection[start:stop] = j0(np.multiply.outer(mu[start:stop], r) / R) @ integrand
+        coef = 2 * projection / (R ** 2 * j1(mu) ** 2)
+    coef.setflags(write=False)
+    return coef
+
+
+@lru_cache(maxsize=16)
+def _decay_rates(size, R, l, k, c, alpha):
+    """
+    Скорости затухания слагаемых ряда rate[n] = (l·k·(μn/R)² + 2α) / (l·c).
+    Кэшируются по набору параметров (size, R, l, k, c, alpha) с вытеснением LRU.
+
+    :param size: длина таблицы (см. _table_size)
+
+    :return массив скоростей затухания длины size
+    """
+    mu = bessel_zeros(size)
+    rate = (l * k * (mu / R) ** 2 + 2 * alpha) / (l * c)
+    rate.setflags(write=False)
+    return rate
+
+
 class SumModel:
     def __init__(self,
                  R=4,
@@ -26,8 +369,36 @@ class SumModel:
                  alpha=0.005,
                  T=150,
                  k=0.065,
-                 c=1.35
+                 c=1.35,
+                 backend=None,
+                 psi=None,
+                 precision='double'
                  ):
+        """
+        :param backend: способ подсчёта суммы ряда (см. resolve_backend): 'python' - исходный поэлементный
+            расчёт через calculate_sum, 'numpy' - матрица точки × слагаемые за один проход NumPy,
+            'numba' - скомпилированное параллельное ядро kernels.sum_series.
+        :param psi: начальный профиль температуры: None - ступенька 10 при r <= R/4 (как config.psi),
+            функция psi(r), массив значений на равномерной сетке [0, R] или кортеж (r, значения).
+            Оценка остатка phi выведена для профиля по умолчанию.
+        :param precision: 'double' - расчёт в float64, 'single' - таблицы, сетки и слагаемые хранятся в float32,
+            а суммирование по слагаемым попарное. После каждого векторизованного расчёта в last_error_bound
+            записывается оценка ошибки округления (без учёта отбрасывания хвоста ряда, см. phi).
+        """
+        if precision not in ('double', 'single'):
+            raise ValueError("precision должен быть 'double' или 'single', получено %r" % precision)
+        self.backend = resolve_backend(backend)
+        self.precision = precision
+        self.dtype = np.float32 if precision == 'single' else np.float64
+        self.last_error_bound = 0.0
+        self.last_terms = 0
+        self._psi_key = None
+        if psi is None or callable(psi):
+            self.psi = psi
+        elif isinstance(psi, tuple):
+            self.psi = SampledProfile(*psi)
+        else:
+            self.psi = SampledProfile(np.linspace(0, R, len(psi)), psi)
         self.c = c
         self.k = k
         self.T = T
@@ -37,8 +408,19 @@ class SumModel:
         self.l = l
         self.R = R
 
-        self.mu_array = jn_zeros(0, 1251)
-
+    def constants(self) -> dict:
+        """
+        :return словарь констант модели (влияют на результат расчёта)
+        """
+        constants = {'R': self.R, 'l': self.l, 'u_c': self.u_c, 'u_b': self.u_b,
+                     'alpha': self.alpha, 'T': self.T, 'k': self.k, 'c': self.c}
+        if isinstance(self.psi, SampledProfile):
+            constants['psi'] = self.psi.key
+        elif self.psi is not None:
+            if self._psi_key is None:
+                self._psi_key = _profile_key(self.psi, self.R)
+            constants['psi'] = self._psi_key
+        return constants
 
     def _calculate_term(self, n: int, r: float, t: float) -> float:
         """
@@ -50,14 +432,56 @@ class SumModel:
 
         :return значение одного слагаемого суммы
         """
-        # mu_n = jn_zeros(0, n)[n - 1]
-        mu_n = self.mu_array[n - 1]
-        result = (5 * jv(1, mu_n / 4)) / (mu_n * (jv(1, mu_n)) ** 2)
-        #result=(5 * jv(1, mu_n / 4)) / (mu_n )
-        result *= exp(-(t * (self.l * self.k * (mu_n / self.R) ** 2 + 2 * self.alpha)) / (self.l * self.c))
+        mu_n = bessel_zeros(n)[n - 1]
+        coef, rate = self.term_tables(n)
+        result = coef[n - 1] * exp(-t * rate[n - 1])
         result *= jv(0, (mu_n * r) / self.R)
         return result
 
+    def term_tables(self, N: int):
+        """
+        Возвращает закэшированные коэффициенты и скорости затухания первых N слагаемых.
+
+        :param N: количество элементов ряда
+
+        :return кортеж (coef, rate) массивов длины N (только для чтения)
+        """
+        size = _table_size(N)
+        coef = _profile_coefficients(size, self.R, self.psi)
+        rate = _decay_rates(size, self.R, self.l, self.k, self.c, self.alpha)
+        return coef[:N], rate[:N]
+
+    def _typed_tables(self, N: int):
+        """
+        Коэффициенты, скорости затухания и нули первых N слагаемых в точности модели
+        """
+        coef, rate = self.term_tables(N)
+        return coef.astype(self.dtype), rate.astype(self.dtype), bessel_zeros(N).astype(self.dtype)
+
+    def _reduce_terms(self, terms: np.ndarray) -> np.ndarray:
+        """
+        Сумма матрицы слагаемых по оси слагаемых (в float32 - попарная)
+        """
+        if self.dtype == np.float64:
+            return terms.sum(axis=1)
+        return _pairwise_sum(terms)
+
+    def _update_error_bound(self, N: int, t_min: float, depth: float):
+        """
+        Оценивает ошибку округления: |слагаемое| <= |coef|·exp(-rate·t) (|J0| <= 1), каждое слагаемое
+        считается с относительной ошибкой ~4 eps, а суммирование добавляет depth eps.
+
+        :param N: количество слагаемых
+        :param t_min: наименьшее t среди точек расчёта
+        :param depth: глубина суммирования (log2 N для попарного суммирования, N - для матричного произведения)
+        """
+        if N == 0:
+            self.last_error_bound = 0.0
+            return
+        coef, rate = self.term_tables(N)
+        magnitude = float(np.sum(np.abs(coef) * np.exp(-rate * max(t_min, 0))))
+        self.last_error_bound = (4 + depth) * float(np.finfo(self.dtype).eps) * magnitude
+
     def phi(self, N, t):
         result = ((self.R**2) * self.c * 5 * 2**0.5) / (2 * self.k * np.pi**2 * t *(N-0.25)**1.5)
         result *= np.exp((-(2*self.alpha*t)/(self.l*self.c)) - ((t*self.k*(np.pi**2)*((N-0.25)**2))/(self.c*(self.R**2))))
@@ -65,10 +489,70 @@ class SumModel:
         return result
 
     def calculate_number_of_iterations(self, epsilon, t):
-        N = 1
-        while self.phi(N, t) > epsilon:
-            N += 1
-        return N
+        """
+        Находит минимальное N >= 1, при котором оценка остатка ряда phi(N, t) не больше epsilon.
+        phi убывает по N, поэтому сначала отрезок [lo, hi] удваивается, пока phi(hi, t) > epsilon,
+        а затем делится пополам.
+
+        :param epsilon: требуемая точность
+        :param t: момент времени (t > 0)
+
+        :return количество элементов ряда
+        """
+        with profiling.span('SumModel.calculate_number_of_iterations', epsilon=epsilon, t=t) as span:
+            n = self._search_number_of_iterations(epsilon, t)
+            span.set(terms=n)
+            return n
+
+    def _search_number_of_iterations(self, epsilon, t):
+        if t <= 0:
+            raise ValueError("оценка остатка ряда определена только для t > 0, получено t=%r" % t)
+        if self.phi(1, t) <= epsilon:
+            return 1
+        lo, hi = 1, 2
+        while self.phi(hi, t) > epsilon:
+            lo, hi = hi, hi * 2
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            if self.phi(mid, t) > epsilon:
+                lo = mid
+            else:
+                hi = mid
+        return hi
+
+    def calculate_number_of_iterations_array(self, epsilon, t) -> np.ndarray:
+        """
+        Векторизованный вариант calculate_number_of_iterations: удвоение и деление пополам
+        выполняются сразу для всех пар (epsilon, t).
+
+        :param epsilon: требуемая точность (число или массив)
+        :param t: моменты времени (число или массив, t > 0)
+
+        :return целочисленный массив количеств элементов ряда формы broadcast(epsilon, t)
+        """
+        with profiling.span('SumModel.calculate_number_of_iterations_array') as span:
+            n_terms = self._search_number_of_iterations_array(epsilon, t)
+            span.set(points=n_terms.size, terms=int(n_terms.max()) if n_terms.size else 0)
+            return n_terms
+
+    def _search_number_of_iterations_array(self, epsilon, t) -> np.ndarray:
+        epsilon, t = np.broadcast_arrays(np.asarray(epsilon, dtype=float), np.asarray(t, dtype=float))
+        if np.any(t <= 0):
+            raise ValueError("оценка остатка ряда определена только для t > 0")
+        first = self.phi(1, t) <= epsilon
+        lo = np.ones(t.shape, dtype=np.int64)
+        hi = np.full(t.shape, 2, dtype=np.int64)
+        pending = self.phi(hi, t) > epsilon
+        while np.any(pending):
+            lo = np.where(pending, hi, lo)
+            hi = np.where(pending, hi * 2, hi)
+            pending = self.phi(hi, t) > epsilon
+        while np.any(hi - lo > 1):
+            mid = (lo + hi) // 2
+            above = self.phi(mid, t) > epsilon
+            lo = np.where(above, mid, lo)
+            hi = np.where(above, hi, mid)
+        return np.where(first, 1, hi)
 
     def calculate_eps_of_iterations(self, N, t):
         return self.phi(N, t)
@@ -88,30 +572,322 @@ class SumModel:
             result += self._calculate_term(i + 1, r, t)
         return result
 
-    def generate_w_data(self, N: int,r: float,p:str, x: int,E:float):
+    def calculate_sum_array(self, r, t, N: int, cancel=None) -> np.ndarray:
         """
-        Генерирует значения функции w(r, t)
+        Векторизованный подсчёт значений функции w(r, t) для массивов точек.
+        Матрица слагаемых (точки × N) считается блоками, чтобы не выходить за _BLOCK_ELEMENTS элементов,
+        и суммируется по оси слагаемых.
 
-        :param N: количество элементов (точность подсчёта функции)
-        :param t: фиксированный параметр t
+        :param r: аргумент функции w (число или массив).
+        :param t: аргумент функции w (число или массив).
+        :param N: количество элементов ряда
+        :param cancel: threading.Event; если оно установлено, расчёт прерывается между блоками исключением Cancelled
+
+        :return массив значений функции w(r, t) формы broadcast(r, t)
+        """
+        if self.backend == 'numba':
+            _check_cancelled(cancel)
+            return self._calculate_sum_numba(r, t, N)
+        coef, rate, mu = self._typed_tables(N)
+        r, t = np.broadcast_arrays(np.asarray(r, dtype=self.dtype), np.asarray(t, dtype=self.dtype))
+
+        r_flat = r.ravel()
+        t_flat = t.ravel()
+        result = np.empty(r_flat.shape[0], dtype=self.dtype)
+        step = max(1, _BLOCK_ELEMENTS // max(N, 1))
+        for start in range(0, r_flat.shape[0], step):
+            _check_cancelled(cancel)
+            stop = start + step
+            terms = coef * np.exp(-np.multiply.outer(t_flat[start:stop], rate))
+            terms *= j0(np.multiply.outer(r_flat[start:stop], mu) / self.dtype(self.R))
+            result[start:stop] = self._reduce_terms(terms)
+        if t_flat.size:
+            self._update_error_bound(N, float(t_flat.min()), np.log2(max(N, 1)))
+        return result.reshape(r.shape)
 
-        :return вектор двух numpy массивов
+    def _calculate_sum_numba(self, r, t, N: int) -> np.ndarray:
         """
-        ox = np.linspace(0.001, x, 800)
-        w = np.zeros(800)
+        Подсчёт значений функции w(r, t) ядром kernels.sum_series (в float64)
+        """
+        from . import kernels
+        coef, rate = self.term_tables(N)
+        r, t = np.broadcast_arrays(np.asarray(r, dtype=float), np.asarray(t, dtype=float))
+        t_flat = np.ascontiguousarray(t.ravel())
+        result = kernels.sum_series(np.ascontiguousarray(r.ravel()), t_flat,
+                                    np.ascontiguousarray(coef), np.ascontiguousarray(rate),
+                                    np.ascontiguousarray(bessel_zeros(N)), float(self.R))
+        if t_flat.size:
+            self._update_error_bound(N, float(t_flat.min()), N)
+        return result.astype(self.dtype, copy=False).reshape(r.shape)
+
+    def calculate_sum_truncated(self, r, t, n_terms, cancel=None) -> np.ndarray:
+        """
+        Подсчёт значений функции w(r, t), где в каждой точке берётся своё количество элементов ряда.
+        Точки упорядочиваются по убыванию n_terms, и каждый блок слагаемых считается только
+        для тех точек, которым он нужен, поэтому работа пропорциональна sum(n_terms).
+
+        :param r: аргумент функции w (число или массив).
+        :param t: аргумент функции w (число или массив).
+        :param n_terms: количество элементов ряда в каждой точке (число или массив)
+        :param cancel: событие отмены (см. calculate_sum_array)
+
+        :return массив значений функции w(r, t) формы broadcast(r, t, n_terms)
+        """
+        r, t, n_terms = np.broadcast_arrays(np.asarray(r, dtype=self.dtype), np.asarray(t, dtype=self.dtype),
+                                            np.asarray(n_terms, dtype=np.int64))
+        order = np.argsort(-n_terms.ravel(), kind='stable')
+        n_sorted = n_terms.ravel()[order]
+        r_sorted = r.ravel()[order]
+        t_sorted = t.ravel()[order]
+        result = np.zeros(len(order), dtype=self.dtype)
+        n_max = int(n_sorted[0]) if len(order) else 0
+        coef, rate, mu = self._typed_tables(n_max)
+        rows = max(1, _BLOCK_ELEMENTS // _TERM_BLOCK)
+        for k0 in range(0, n_max, _TERM_BLOCK):
+            k1 = min(k0 + _TERM_BLOCK, n_max)
+            # точки отсортированы по убыванию n_terms, поэтому блок нужен префиксу массива
+            active = np.count_nonzero(n_sorted > k0)
+            for start in range(0, active, rows):
+                _check_cancelled(cancel)
+                stop = min(start + rows, active)
+                terms = coef[k0:k1] * np.exp(-np.multiply.outer(t_sorted[start:stop], rate[k0:k1]))
+                terms *= j0(np.multiply.outer(r_sorted[start:stop], mu[k0:k1]) / self.dtype(self.R))
+                terms[np.arange(k0, k1) >= n_sorted[start:stop, None]] = 0
+                result[start:stop] += self._reduce_terms(terms)
+        if len(order):
+            # блоки складываются последовательно: log2 внутри блока плюс число блоков
+            self._update_error_bound(n_max, float(t_sorted.min()),
+                                     np.log2(_TERM_BLOCK) + -(-n_max // _TERM_BLOCK))
+        w = np.empty(len(order), dtype=self.dtype)
+        w[order] = result
+        return w.reshape(r.shape)
+
+    def iter_w_field(self, r, t, N: int, max_bytes=_FIELD_MAX_BYTES, cancel=None):
+        """
+        Считает поле w(r, t) на сетке r × t блоками строк.
+        Слагаемое ряда раскладывается на множители coef·J0(μn·r/R), зависящий только от r,
+        и exp(-rate·t), зависящий только от t, поэтому блок поля - произведение матриц.
+
+        :param r: одномерный массив значений r (строки поля)
+        :param t: одномерный массив значений t (столбцы поля)
+        :param N: количество элементов ряда
+        :param max_bytes: ограничение памяти на матрицу множителей по t и один блок строк
+        :param cancel: событие отмены (см. calculate_sum_array)
+
+        :return генератор кортежей (start, stop, block), где block = w(r[start:stop], t) формы (stop - start, len(t))
+        """
+        r = np.asarray(r, dtype=self.dtype)
+        t = np.asarray(t, dtype=self.dtype)
+        coef, rate, mu = self._typed_tables(N)
+        decay = np.exp(-np.multiply.outer(rate, t))
+        if len(t):
+            self._update_error_bound(N, float(t.min()), N)
+        row_bytes = (N + len(t)) * decay.itemsize
+        rows = (max_bytes - decay.nbytes) // row_bytes
+        if rows < 1:
+            raise ValueError("max_bytes=%d недостаточно: матрица exp(-rate·t) занимает %d байт, строка поля - %d байт"
+                             % (max_bytes, decay.nbytes, row_bytes))
+        for start in range(0, len(r), rows):
+            _check_cancelled(cancel)
+            stop = min(start + rows, len(r))
+            spatial = coef * j0(np.multiply.outer(r[start:stop], mu) / self.dtype(self.R))
+            yield start, stop, spatial @ decay
+
+    def generate_w_field(self, r, t, N: int, max_bytes=_FIELD_MAX_BYTES, out=None, cancel=None) -> np.ndarray:
+        """
+        Генерирует поле w(r, t) на сетке r × t (см. iter_w_field)
+
+        :param r: одномерный массив значений r
+        :param t: одномерный массив значений t
+        :param N: количество элементов ряда
+        :param max_bytes: ограничение памяти на промежуточные блоки
+        :param out: массив формы (len(r), len(t)) для записи результата или путь к .npy файлу,
+            который будет открыт через np.memmap; по умолчанию создаётся новый массив
+        :param cancel: событие отмены (см. calculate_sum_array)
+
+        :return массив (или np.memmap) со значениями поля
+        """
+        shape = (len(r), len(t))
+        if out is None:
+            out = np.empty(shape, dtype=self.dtype)
+        elif isinstance(out, (str, os.PathLike)):
+            out = np.lib.format.open_memmap(out, mode='w+', dtype=self.dtype, shape=shape)
+        for start, stop, block in self.iter_w_field(r, t, N, max_bytes, cancel):
+            out[start:stop] = block
+        if isinstance(out, np.memmap):
+            out.flush()
+        return out
+
+    def iter_w_time(self, r: float, t_start: float, dt: float, chunk=1024, t_stop=None,
+                    N=None, epsilon=None, tol=None):
+        """
+        Потоково считает w(r, t) в точках t_start, t_start + dt, ... блоками по chunk точек.
+        Множители exp(-rate·t) переносятся от блока к блоку умножением на exp(-rate·chunk·dt)
+        (и пересчитываются заново каждые _STREAM_REANCHOR блоков), а слагаемые, вклад которых
+        |coef·J0(μn·r/R)|·exp(-rate·t) стал меньше tol, отбрасываются навсегда, так как дальше они
+        только убывают. Память не зависит от длины промежутка, а стоимость блока падает с ростом t.
+        Количество слагаемых в последнем блоке записывается в last_terms.
+
+        :param r: фиксированный радиус
+        :param t_start: начальный момент времени
+        :param dt: шаг по времени
+        :param chunk: количество точек в блоке
+        :param t_stop: последний момент времени (включительно) или None - бесконечный поток
+        :param N: количество элементов ряда; если не задано, подбирается по epsilon в момент t_start
+        :param epsilon: требуемая точность (используется, если не задано N)
+        :param tol: порог вклада слагаемого; по умолчанию epsilon / N (суммарно отброшено не больше epsilon)
+            или 0, если epsilon не задан
+
+        :return генератор кортежей (t, w) массивов длины chunk (последний блок может быть короче)
+        """
+        if N is None:
+            if epsilon is None:
+                raise ValueError("нужно задать N или epsilon")
+            N = self.calculate_number_of_iterations(epsilon, t_start)
+        if tol is None:
+            tol = epsilon / N if epsilon is not None else 0.0
+        coef, rate, mu = self._typed_tables(N)
+        spatial = coef * j0(mu * self.dtype(r) / self.dtype(self.R))
+        offsets = np.arange(chunk, dtype=self.dtype) * self.dtype(dt)
+        step = np.exp(-np.multiply.outer(offsets, rate))
+        shift = np.exp(-rate * self.dtype(chunk * dt))
+        index = 0
+        base = None
+        while True:
+            t0 = t_start + index * chunk * dt
+            if t_stop is not None and t0 > t_stop:
+                return
+            if base is None or index % _STREAM_REANCHOR == 0:
+                base = np.exp(-rate * self.dtype(t0))
+            else:
+                base *= shift
+            # вклад слагаемых убывает по t, поэтому достаточно проверить начало блока
+            significant = np.nonzero(np.abs(spatial * base) >= tol)[0]
+            n_active = significant[-1] + 1 if len(significant) else 0
+            if n_active < len(rate):
+                spatial, rate, base, shift = spatial[:n_active], rate[:n_active], base[:n_active], shift[:n_active]
+                step = step[:, :n_active]
+            self.last_terms = n_active
+            t = t0 + offsets
+            w = step @ (spatial * base)
+            if t_stop is not None and t[-1] > t_stop:
+                count = np.count_nonzero(t <= t_stop)
+                yield t[:count], w[:count]
+                return
+            yield t, w
+            index += 1
+
+    def _line_terms(self, ox, r, p, E) -> np.ndarray:
+        """
+        Количество элементов ряда в каждой точке графика по оценке остатка phi
+        """
+        if p == 'r':
+            return self.calculate_number_of_iterations_array(E, ox)
+        return np.full(len(ox), self.calculate_number_of_iterations(E, r))
+
+    def _line_values(self, ox, N, r, p, E, adaptive, cancel=None):
+        """
+        Значения w в точках графика ox (см. generate_w_data)
+
+        :return кортеж (w, n_terms), где n_terms - количество элементов ряда в каждой точке при adaptive=True,
+            иначе None
+        """
+        if adaptive:
+            n_terms = self._line_terms(ox, r, p, E)
+            if p == 'r':
+                return self.calculate_sum_truncated(r=r, t=ox, n_terms=n_terms, cancel=cancel), n_terms
+            return self.calculate_sum_truncated(r=ox, t=r, n_terms=n_terms, cancel=cancel), n_terms
+        if self.backend != 'python':
+            if p == 'r':
+                return self.calculate_sum_array(r=r, t=ox, N=N, cancel=cancel), None
+            return self.calculate_sum_array(r=ox, t=r, N=N, cancel=cancel), None
+        w = np.zeros(len(ox))
         if p=='r':
-            for i in range(800):
+            for i in range(len(ox)):
+                _check_cancelled(cancel)
                 w[i] = self.calculate_sum(r=r, t=ox[i], N=N)
         else:
 
-            for i in range(800):
+            for i in range(len(ox)):
+                _check_cancelled(cancel)
                 w[i] = self.calculate_sum(r=ox[i], t=r, N=N)
-        if r!=0:
-            #print(abs(abs(self.calculate_sum(r=r,t=ox[0],N=N))-abs(self.calculate_sum(r=r,t=ox[0],N=self.calculate_number_of_iterations(E,r)))))
-            print(w[0])
+        return w, None
+
+    def generate_w_data(self, N: int,r: float,p:str, x: int,E:float, adaptive=False,
+                        points=800, start=0.001, spacing='uniform', cancel=None):
+        """
+        Генерирует значения функции w(r, t)
+
+        :param N: количество элементов (точность подсчёта функции)
+        :param r: фиксированный параметр (r при p='r', t при p='t')
+        :param p: 'r' - зависимость от t при фиксированном r, иначе - зависимость от r при фиксированном t
+        :param x: правая граница промежутка
+        :param E: точность, используется при adaptive=True
+        :param adaptive: выбирать количество элементов ряда в каждой точке по оценке остатка phi,
+            чтобы погрешность не превышала E (N при этом не используется)
+        :param points: количество точек графика
+        :param start: левая граница промежутка
+        :param spacing: расположение точек: 'uniform' - равномерно, 'log' - в геометрической прогрессии,
+            'adaptive' - сгущение там, где больше кривизна графика (см. refine_grid)
+        :param cancel: threading.Event; если оно установлено, расчёт прерывается между блоками исключением Cancelled
+
+        :return вектор двух numpy массивов (ox, w), а при adaptive=True - (ox, w, n_terms),
+            где n_terms - количество элементов ряда, взятое в каждой точке
+        """
+        with profiling.span('SumModel.generate_w_data', backend=self.backend, p=p, spacing=spacing) as span:
+            if spacing == 'adaptive':
+                # n_terms новых точек каждого прохода собираются и упорядочиваются так же, как точки в refine_grid
+                grids, terms = [], []
+
+                def evaluate(grid):
+                    values, n_terms = self._line_values(grid, N, r, p, E, adaptive, cancel)
+                    grids.append(grid)
+                    terms.append(n_terms)
+                    return values
+
+                ox, w = refine_grid(evaluate, start, x, points)
+                if adaptive:
+                    n_terms = np.concatenate(terms)[np.argsort(np.concatenate(grids), kind='stable')]
+            else:
+                ox = make_grid(start, x, points, spacing)
+                w, n_terms = self._line_values(ox, N, r, p, E, adaptive, cancel)
+            if adaptive:
+                span.set(points=len(ox), terms=int(n_terms.max()), evaluations=int(n_terms.sum()))
+                return ox, w, n_terms
+            span.set(points=len(ox), terms=N, evaluations=N * len(ox))
+        logger.debug("generate_w_data N=%s r=%s p=%s: w[0]=%r", N, r, p, w[0] if len(w) else None)
+        return ox, w
+
+
+    def generate_w_family(self, N: int, values, p: str, x: int, points=800, start=0.001, spacing='uniform',
+                          cancel=None):
+        """
+        Генерирует семейство графиков w(r, t) на общем промежутке за один проход:
+        при p='r' - зависимости от t для каждого r из values, иначе - зависимости от r для каждого t.
+        Все графики - строки одного поля generate_w_field, поэтому множители exp(-rate·t)
+        (или J0(μn·r/R)) общей оси считаются один раз на всё семейство.
+
+        :param N: количество элементов ряда
+        :param values: фиксированные значения r (при p='r') или t (иначе)
+        :param p: 'r' или 't', как в generate_w_data
+        :param x: правая граница промежутка
+        :param points: количество точек графика
+        :param start: левая граница промежутка
+        :param spacing: расположение точек: 'uniform' или 'log' (см. make_grid)
+        :param cancel: событие отмены (см. generate_w_data)
+
+        :return кортеж (ox, w), где w - массив формы (len(values), points), строка i - график для values[i]
+        """
+        with profiling.span('SumModel.generate_w_family', p=p, curves=len(values)) as span:
+            ox = make_grid(start, x, points, spacing)
+            values = np.asarray(values, dtype=float)
+            if p == 'r':
+                w = self.generate_w_field(values, ox, N, cancel=cancel)
+            else:
+                w = self.generate_w_field(ox, values, N, cancel=cancel).T
+            span.set(points=len(ox), terms=N, evaluations=N * (len(ox) + len(values)))
         return ox, w
 
 
 if __name__ == "__main__":
-    model = SumModel()
-    print(model.mu_array)
+    print(bessel_zeros(20))
@@ -0,0 +1,173 @@
+"""
+Замеры времени основных этапов: расчёт ряда, подбор количества слагаемых, отрисовка.
+Содержит:
+* span - контекстный менеджер, который замеряет время блока кода и отправляет запись в приёмник.
+* set_sink, get_sink, configure_from_env - выбор приёмника записей.
+* LoggingSink, JsonLinesSink, RingBufferSink - приёмники: logging, файл JSON lines, кольцевой буфер в памяти.
+
+Пока приёмник не задан, span возвращает один и тот же пустой объект, поэтому замеры почти ничего не стоят.
+
+Пример:
+    with profiling.span('SumModel.generate_w_data', points=800) as s:
+        ...
+        s.set(terms=N)
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+_sink = None
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+    def set(self, **fields):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """
+    Замер одного блока кода. Запись вида
+        {'name': имя, 'seconds': время, 'thread': имя потока, ...поля}
+    отправляется в приёмник при выходе из блока.
+    """
+
+    __slots__ = ('name', 'fields', 'sink', 'start')
+
+    def __init__(self, name: str, fields: dict, sink):
+        self.name = name
+        self.fields = fields
+        self.sink = sink
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        record = {'name': self.name, 'seconds': time.perf_counter() - self.start,
+                  'thread': threading.current_thread().name}
+        record.update(self.fields)
+        if exc_type is not None:
+            record['error'] = exc_type.__name__
+        self.sink(record)
+        return False
+
+    def set(self, **fields):
+        """
+        Добавляет поля к записи (количество слагаемых, точек, попадание в кэш и т.п.)
+        """
+        self.fields.update(fields)
+
+
+def span(name: str, **fields):
+    """
+    :param name: имя замера, например 'SumModel.generate_w_data'
+    :param fields: начальные поля записи
+
+    :return контекстный менеджер с методом set(**fields)
+    """
+    sink = _sink
+    if sink is None:
+        return _NULL_SPAN
+    return Span(name, fields, sink)
+
+
+def set_sink(sink):
+    """
+    :param sink: функция, принимающая словарь-запись, или None, чтобы выключить замеры
+
+    :return предыдущий приёмник
+    """
+    global _sink
+    previous, _sink = _sink, sink
+    return previous
+
+
+def get_sink():
+    return _sink
+
+
+class LoggingSink:
+    """
+    Пишет записи в logging
+    """
+
+    def __init__(self, logger=None, level=logging.DEBUG):
+        self.logger = logger or logging.getLogger('heat.profiling')
+        self.level = level
+
+    def __call__(self, record: dict):
+        fields = ' '.join('%s=%s' % (key, value) for key, value in record.items()
+                          if key not in ('name', 'seconds'))
+        self.logger.log(self.level, '%s %.3f ms %s', record['name'], record['seconds'] * 1000, fields)
+
+
+class JsonLinesSink:
+    """
+    Дописывает записи в файл, по одной JSON-строке на запись
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def __call__(self, record: dict):
+        line = json.dumps(record, default=str) + '\n'
+        with self._lock:
+            with open(self.path, 'a') as f:
+                f.write(line)
+
+
+class RingBufferSink:
+    """
+    Хранит последние maxlen записей в памяти (например, для строки состояния View)
+    """
+
+    def __init__(self, maxlen=256):
+        self.records = deque(maxlen=maxlen)
+
+    def __call__(self, record: dict):
+        self.records.append(record)
+
+    def last(self, name=None):
+        """
+        :param name: имя замера, кортеж имён или None
+
+        :return последняя запись с таким именем (или просто последняя) или None
+        """
+        names = (name,) if isinstance(name, str) else name
+        for record in reversed(self.records):
+            if names is None or record['name'] in names:
+                return record
+        return None
+
+
+def configure_from_env():
+    """
+    Включает замеры по переменной окружения HEAT_PROFILE:
+    'log' - LoggingSink, 'ring' - RingBufferSink, иначе - путь к файлу для JsonLinesSink.
+    Если переменная не задана, приёмник не меняется.
+
+    :return текущий приёмник
+    """
+    value = os.environ.get('HEAT_PROFILE')
+    if value == 'log':
+        set_sink(LoggingSink())
+    elif value == 'ring':
+        set_sink(RingBufferSink())
+    elif value:
+        set_sink(JsonLinesSink(value))
+    return _sink
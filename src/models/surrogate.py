@@ -0,0 +1,206 @@
+"""
+Табличная замена ряда для быстрых запросов w(r, t)
+Содержит:
+* build_surrogate - функция, которая считает ряд на сетке r × log t, сгущая её до заданной точности.
+* Surrogate - бикубический эрмитов интерполянт w(r, t) на этой сетке.
+* load_surrogate - функция, которая открывает сохранённый интерполянт без копирования (mmap).
+
+В узлах сетки хранятся w и аналитические производные dw/dr, dw/du и d²w/(dr·du), где u = ln t.
+Файл - один массив .npy: заголовок длины _HEADER_SIZE, а за ним четыре таблицы (4, nr, nt).
+"""
+
+import numpy as np
+from scipy.special import j0, j1
+
+from .model import SumModel, bessel_zeros
+
+# версия формата файла (первый элемент заголовка)
+_FORMAT_VERSION = 1.0
+# заголовок: версия, nr, nt, r0, r1, u0, u1, ошибка в серединах ячеек
+_HEADER_SIZE = 8
+# число узлов по каждой оси в начале сгущения
+_INITIAL_POINTS = 17
+# наибольшее число узлов по одной оси
+_MAX_POINTS = 1 << 13
+# число точек запроса, обрабатываемых за раз (ограничивает память на промежуточные массивы)
+_QUERY_BLOCK = 1 << 18
+
+
+def _hermite_basis(x: np.ndarray):
+    """
+    Базисные многочлены кубической интерполяции Эрмита на [0, 1]:
+    значения в левом и правом узле и производные в левом и правом узле
+    """
+    x2 = x * x
+    x3 = x2 * x
+    return 2 * x3 - 3 * x2 + 1, -2 * x3 + 3 * x2, x3 - 2 * x2 + x, x3 - x2
+
+
+class Surrogate:
+    """
+    Бикубический эрмитов интерполянт w(r, t) на равномерной по r и ln t сетке.
+    Хранит упакованный массив (заголовок + таблицы), поэтому может работать поверх np.memmap.
+    """
+
+    def __init__(self, packed: np.ndarray):
+        """
+        :param packed: одномерный массив float64: заголовок длины _HEADER_SIZE и таблицы (4, nr, nt)
+        """
+        header = np.asarray(packed[:_HEADER_SIZE])
+        if header[0] != _FORMAT_VERSION:
+            raise ValueError("неизвестная версия формата интерполянта: %r" % header[0])
+        self.packed = packed
+        nr, nt = int(header[1]), int(header[2])
+        self.r_range = (float(header[3]), float(header[4]))
+        self.u_range = (float(header[5]), float(header[6]))
+        self.error = float(header[7])
+        self.shape = (nr, nt)
+        self.tables = packed[_HEADER_SIZE:].reshape(4, nr * nt)
+
+    @property
+    def t_range(self):
+        return tuple(np.exp(self.u_range))
+
+    def save(self, path):
+        """
+        Сохраняет интерполянт в один файл .npy (открывается load_surrogate с mmap_mode='r')
+        """
+        np.save(path, np.asarray(self.packed))
+
+    def __call__(self, r, t) -> np.ndarray:
+        """
+        Значения интерполянта в точках (r, t)
+
+        :param r: аргумент функции w (число или массив) из r_range
+        :param t: аргумент функции w (число или массив) из t_range
+
+        :return массив значений формы broadcast(r, t)
+        """
+        r, t = np.broadcast_arrays(np.asarray(r, dtype=float), np.asarray(t, dtype=float))
+        r_flat, t_flat = r.ravel(), t.ravel()
+        result = np.empty(r_flat.shape[0])
+        for start in range(0, len(result), _QUERY_BLOCK):
+            stop = start + _QUERY_BLOCK
+            result[start:stop] = self._evaluate(r_flat[start:stop], t_flat[start:stop])
+        return result.reshape(r.shape)
+
+    def _evaluate(self, r: np.ndarray, t: np.ndarray) -> np.ndarray:
+        nr, nt = self.shape
+        (r0, r1), (u0, u1) = self.r_range, self.u_range
+        with np.errstate(divide='ignore', invalid='ignore'):
+            u = np.log(t)
+        # с допуском на округление ln(exp(u1))
+        slack = 1e-12 * max(1.0, abs(u0), abs(u1))
+        if not (np.all((r >= r0) & (r <= r1)) and np.all((u >= u0 - slack) & (u <= u1 + slack))):
+            raise ValueError("точки вне области интерполянта r в [%g, %g], t в [%g, %g]"
+                             % (r0, r1, *self.t_range))
+        hr = (r1 - r0) / (nr - 1)
+        hu = (u1 - u0) / (nt - 1)
+        x = (r - r0) / hr
+        y = (u - u0) / hu
+        i = np.clip(x.astype(np.int64), 0, nr - 2)
+        j = np.clip(y.astype(np.int64), 0, nt - 2)
+        x -= i
+        y -= j
+        ax0, ax1, bx0, bx1 = _hermite_basis(x)
+        ay0, ay1, by0, by1 = _hermite_basis(y)
+        bx0 *= hr
+        bx1 *= hr
+        by0 *= hu
+        by1 *= hu
+
+        value, d_r, d_u, d_ru = self.tables
+        result = np.zeros(len(r))
+        corner = i * nt + j
+        for offset, wx, dx, wy, dy in ((0, ax0, bx0, ay0, by0), (1, ax0, bx0, ay1, by1),
+                                       (nt, ax1, bx1, ay0, by0), (nt + 1, ax1, bx1, ay1, by1)):
+            index = corner + offset
+            result += wy * (wx * value[index] + dx * d_r[index])
+            result += dy * (wx * d_u[index] + dx * d_ru[index])
+        return result
+
+
+def _node_tables(model: SumModel, r: np.ndarray, t: np.ndarray, N: int, derivatives=True) -> np.ndarray:
+    """
+    w и производные по r и u = ln t на сетке r × t произведениями матриц множителей:
+        w = Σ coef·J0(μ·r/R)·exp(-rate·t),
+        dw/dr = -Σ coef·(μ/R)·J1(μ·r/R)·exp(-rate·t),
+        dw/du = t·dw/dt = -t·Σ coef·J0(μ·r/R)·rate·exp(-rate·t).
+
+    :return массив (4, len(r), len(t)) или (len(r), len(t)), если derivatives=False
+    """
+    coef, rate = model.term_tables(N)
+    mu = bessel_zeros(N)
+    argument = np.multiply.outer(r, mu) / model.R
+    decay = np.exp(-np.multiply.outer(rate, t))
+    spatial = coef * j0(argument)
+    if not derivatives:
+        return spatial @ decay
+    spatial_dr = -coef * (mu / model.R) * j1(argument)
+    decay_du = -t * (rate[:, None] * decay)
+    return np.stack([spatial @ decay, spatial_dr @ decay, spatial @ decay_du, spatial_dr @ decay_du])
+
+
+def _pack(r: np.ndarray, u: np.ndarray, tables: np.ndarray, error: float) -> np.ndarray:
+    header = [_FORMAT_VERSION, len(r), len(u), r[0], r[-1], u[0], u[-1], error]
+    return np.concatenate([header, tables.ravel()])
+
+
+def build_surrogate(model: SumModel, t_min: float, t_max=None, tol=1e-6, N=None, r_max=None) -> Surrogate:
+    """
+    Строит интерполянт w(r, t) на [0, r_max] × [t_min, t_max].
+    Сетка равномерна по r и по ln t (у малых t поле меняется быстрее). Ошибка интерполянта проверяется
+    по точному ряду в серединах рёбер и в центрах всех ячеек; ось, вдоль которой ошибка больше tol,
+    сгущается вдвое, пока ошибка везде не станет не больше tol. Ряд обрезается так, чтобы оценка
+    остатка phi при t_min была не больше tol / 2.
+
+    :param model: модель, ряд которой заменяется
+    :param t_min: наименьшее t (t_min > 0)
+    :param t_max: наибольшее t (по умолчанию - model.T)
+    :param tol: допустимая ошибка интерполяции
+    :param N: количество элементов ряда (по умолчанию - по оценке остатка phi)
+    :param r_max: наибольшее r (по умолчанию - model.R)
+
+    :return Surrogate; в error записана наибольшая найденная ошибка в серединах ячеек
+    """
+    if t_max is None:
+        t_max = model.T
+    if r_max is None:
+        r_max = model.R
+    if not 0 < t_min < t_max:
+        raise ValueError("нужно 0 < t_min < t_max, получено t_min=%r, t_max=%r" % (t_min, t_max))
+    if N is None:
+        N = model.calculate_number_of_iterations(tol / 2, t_min)
+    nr = nt = _INITIAL_POINTS
+    while True:
+        r = np.linspace(0, r_max, nr)
+        u = np.linspace(np.log(t_min), np.log(t_max), nt)
+        t = np.exp(u)
+        surrogate = Surrogate(_pack(r, u, _node_tables(model, r, t, N), 0.0))
+
+        r_mid = (r[1:] + r[:-1]) / 2
+        t_mid = np.exp((u[1:] + u[:-1]) / 2)
+        errors = []
+        for r_check, t_check in ((r_mid, t), (r, t_mid), (r_mid, t_mid)):
+            exact = _node_tables(model, r_check, t_check, N, derivatives=False)
+            errors.append(np.max(np.abs(surrogate(r_check[:, None], t_check) - exact)))
+        error_r, error_u, error_center = errors
+        refine_r = error_r > tol or (error_center > tol and error_r >= error_u)
+        refine_u = error_u > tol or (error_center > tol and error_u >= error_r)
+        if not (refine_r or refine_u):
+            return Surrogate(_pack(r, u, surrogate.tables.reshape(4, nr, nt), max(errors)))
+        if refine_r:
+            nr = 2 * nr - 1
+        if refine_u:
+            nt = 2 * nt - 1
+        if max(nr, nt) > _MAX_POINTS:
+            raise ValueError("точность tol=%g не достигается на сетке до %d узлов по оси; увеличьте t_min или tol"
+                             % (tol, _MAX_POINTS))
+
+
+def load_surrogate(path) -> Surrogate:
+    """
+    Открывает интерполянт из файла .npy отображением в память: таблицы не копируются
+    и разделяются между процессами, открывшими один файл.
+    """
+    return Surrogate(np.load(path, mmap_mode='r'))
@@ -0,0 +1,41 @@
+"""
+Прореживание графиков под разрешение холста
+Содержит:
+* downsample_minmax - функция, которая оставляет минимум и максимум в каждом столбце пикселей.
+"""
+
+import numpy as np
+
+
+def downsample_minmax(x: np.ndarray, y: np.ndarray, buckets: int, x_range=None):
+    """
+    Прореживает график (x, y) с возрастающими x: промежуток делится на buckets равных частей
+    (по одной на столбец пикселей), и в каждой части остаются только точки минимума и максимума y.
+    Нарисованная ломаная при этом выглядит так же, как полная, а точек не больше 2·buckets + 2.
+
+    :param x: возрастающий массив абсцисс
+    :param y: массив ординат
+    :param buckets: количество частей (ширина области графика в пикселях)
+    :param x_range: (левая, правая) граница видимой области или None - весь график;
+        точки вне области отбрасываются, кроме ближайших соседей, чтобы линия доходила до края
+
+    :return кортеж (x, y) прореженных массивов
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if x_range is not None and len(x):
+        lo = max(np.searchsorted(x, x_range[0], side='left') - 1, 0)
+        hi = min(np.searchsorted(x, x_range[1], side='right') + 1, len(x))
+        x = x[lo:hi]
+        y = y[lo:hi]
+    buckets = max(int(buckets), 1)
+    if len(x) <= 2 * buckets + 2 or x[-1] == x[0]:
+        return x, y
+    index = ((x - x[0]) * (buckets / (x[-1] - x[0]))).astype(np.int64)
+    np.clip(index, 0, buckets - 1, out=index)
+    # внутри части точки сортируются по y: первая - минимум, последняя - максимум
+    order = np.lexsort((y, index))
+    starts = np.flatnonzero(np.r_[True, index[1:] != index[:-1]])
+    ends = np.r_[starts[1:], len(x)] - 1
+    keep = np.unique(np.concatenate([order[starts], order[ends], [0, len(x) - 1]]))
+    return x[keep], y[keep]
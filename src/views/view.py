@@ -5,6 +5,8 @@ import numpy as np
 from matplotlib.backends.backend_tkagg import (FigureCanvasTkAgg,
                                                NavigationToolbar2Tk)  # NavigationToolbar2TkAgg является устаревшим
 from tkinter import ttk
+from models import profiling
+from views.lod import downsample_minmax
 
 mpl.use("TkAgg")
 
@@ -13,6 +15,17 @@ class MPLgraph(FigureCanvasTkAgg):
     """
     Matplotlib объект похожий на tk.Canvas()
     Используется объектом View для отображения графика
+
+    Графики хранятся по ключу - идентификатору параметров расчёта (по умолчанию ключ - подпись);
+    подпись только показывается в легенде. Повторный plot с тем же ключом меняет данные существующей линии
+    через set_data. Если пределы осей при этом не изменились, линии перерисовываются поверх
+    сохранённого фона (blit), иначе полная перерисовка откладывается через draw_idle.
+    Легенда хранится постоянно и пересоздаётся только при появлении новых графиков.
+    plot_many рисует несколько графиков с одной перерисовкой.
+
+    На холст выводятся прореженные под ширину области графика в пикселях данные (downsample_minmax),
+    а полные массивы хранятся в full_data. При зуме и сдвиге через панель инструментов
+    и при изменении размера окна линии заново прореживаются из полных данных для видимой области.
     """
 
     def __init__(self, figure: mpl.figure.Figure, parent=None, **options):
@@ -22,31 +35,155 @@ class MPLgraph(FigureCanvasTkAgg):
         FigureCanvasTkAgg.__init__(self, figure, parent, **options)
         self.figure = figure
         self.add = figure.add_subplot(111)
+        self.lines = {}
+        self.full_data = {}
+        self.lgn = None
+        self.background = None
+        self.capturing_background = False
         # .show() является устаревшим и заменён на .draw(). См.:
         # https://github.com/matplotlib/matplotlib/pull/9275
         self.draw()
         self.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=1)
         self.toolbar = NavigationToolbar2Tk(self, parent)
         self.toolbar.update()
-        
+        self.mpl_connect('draw_event', self.on_draw)
+        self.mpl_connect('resize_event', lambda event: self.on_xlim_changed(self.add))
+        self.add.callbacks.connect('xlim_changed', self.on_xlim_changed)
+
+    def downsample(self, x: np.array, y: np.array, x_range=None):
+        """
+        Прореживает данные под ширину области графика в пикселях
+        """
+        return downsample_minmax(x, y, self.add.bbox.width, x_range)
+
+    def on_xlim_changed(self, axes):
+        """
+        Заново прореживает все линии для видимой области (после зума, сдвига или изменения размера).
+        """
+        x_range = None if axes.get_autoscalex_on() else axes.get_xlim()
+        for key, line in self.lines.items():
+            line.set_data(*self.downsample(*self.full_data[key], x_range))
+
+    def get_full_data(self, key):
+        """
+        :param key: ключ графика (см. plot)
+
+        :return кортеж (x, y) полных (не прореженных) массивов графика
+        """
+        return self.full_data[key]
+
+    def on_draw(self, event):
+        """
+        После любой полной перерисовки (зум, resize, новая линия) сохранённый фон устаревает.
+        """
+        if not self.capturing_background:
+            self.background = None
 
-    def plot(self, x: np.array, y: np.array, color,label):
+    def plot(self, x: np.array, y: np.array, color,label, key=None):
         """
         Берёт массивы координат x и y, по ним рисует графики.
+        Если график с таким ключом уже есть, обновляет его данные.
+
+        :param key: ключ графика (например, cache.make_key от параметров расчёта); по умолчанию - label
+        """
+        if key is None:
+            key = label
+        with profiling.span('MPLgraph.plot', points=len(x), lines=len(self.lines)) as span:
+            added = self.set_line(x, y, color, label, key)
+            span.set(drawn_points=len(self.lines[key].get_xdata()))
+            self.redraw(added, span)
+
+    def plot_many(self, curves):
+        """
+        Рисует несколько графиков с одной перерисовкой холста.
+
+        :param curves: список кортежей (x, y, color, label, key), как аргументы plot
         """
-        self.add.plot(x, y,color = color,label=label)
-        self.lgn=self.figure.legend()
-        self.figure.canvas.draw()
-        self.lgn.remove()
+        with profiling.span('MPLgraph.plot_many', curves=len(curves), lines=len(self.lines)) as span:
+            added = [self.set_line(*curve) for curve in curves]
+            self.redraw(any(added), span)
 
+    def set_line(self, x: np.array, y: np.array, color, label, key=None) -> bool:
+        """
+        Задаёт данные графика с ключом key (по умолчанию - label) без перерисовки холста.
+
+        :return был ли добавлен новый график
+        """
+        if key is None:
+            key = label
+        self.full_data[key] = (x, y)
+        x_range = None if self.add.get_autoscalex_on() else self.add.get_xlim()
+        x, y = self.downsample(x, y, x_range)
+        line = self.lines.get(key)
+        if line is None:
+            self.lines[key], = self.add.plot(x, y,color = color,label=label)
+            return True
+        line.set_data(x, y)
+        return False
+
+    def redraw(self, added: bool, span):
+        """
+        Перерисовывает холст после set_line: полностью, если появились новые графики или изменились пределы осей,
+        иначе - только линии (blit_lines).
+        """
+        if added:
+            self.update_legend()
+            self.draw_idle()
+            span.set(redraw='idle')
+            return
+        limits = (self.add.get_xlim(), self.add.get_ylim())
+        self.add.relim()
+        self.add.autoscale_view()
+        if limits != (self.add.get_xlim(), self.add.get_ylim()):
+            self.draw_idle()
+            span.set(redraw='idle')
+        else:
+            self.blit_lines()
+            span.set(redraw='blit')
+
+    def update_legend(self):
+        """
+        Пересоздаёт легенду по текущему набору линий.
+        """
+        if self.lgn is not None:
+            self.lgn.remove()
+            self.lgn = None
+        if self.lines:
+            self.lgn = self.figure.legend()
+
+    def blit_lines(self):
+        """
+        Перерисовывает только линии поверх фона осей без линий.
+        Фон снимается одной полной перерисовкой и используется, пока не изменятся оси.
+        """
+        if self.background is None:
+            for line in self.lines.values():
+                line.set_visible(False)
+            self.capturing_background = True
+            try:
+                self.draw()
+                self.background = self.copy_from_bbox(self.figure.bbox)
+            finally:
+                self.capturing_background = False
+                for line in self.lines.values():
+                    line.set_visible(True)
+        self.restore_region(self.background)
+        for line in self.lines.values():
+            self.add.draw_artist(line)
+        self.blit(self.figure.bbox)
 
     def clear(self):
         """
         Очищает область с графиком.
         """
         self.add.clear()
-        #self.lgn.remove()
-        self.figure.canvas.draw()
+        # Axes.clear() пересоздаёт реестр обработчиков осей
+        self.add.callbacks.connect('xlim_changed', self.on_xlim_changed)
+        self.lines = {}
+        self.full_data = {}
+        self.update_legend()
+        self.background = None
+        self.draw_idle()
 
 
 class View(ttk.Frame):
@@ -60,7 +197,7 @@ class View(ttk.Frame):
     values = {'base': b, 'exponent': e}
 
     где b и e - float,
-    и возвращает (x, y) кортеж из numpy.array.
+    и возвращает (x, y) кортеж из numpy.array, и метод clear_session(), который забывает нарисованные графики.
 
     Предоставление содержит следующие методы для внешнего использования контроллером:
 
@@ -97,6 +234,8 @@ class View(ttk.Frame):
         self.countN = None
         self.eps_param = None
         self.eps_entry = None
+        self.progress = None
+        self.status = None
         self.pack()
 
         self.parent = parent
@@ -130,7 +269,8 @@ class View(ttk.Frame):
         
         self.btn.pack(side=tk.LEFT)
 
-        self.named_param_entry = self.add_entry()
+        # несколько значений через запятую рисуются семейством графиков
+        self.named_param_entry = self.add_entry(self.is_number_list_or_empty)
         self.named_param = tk.StringVar()
         self.named_param_entry.config(textvariable=self.named_param)
 
@@ -142,16 +282,22 @@ class View(ttk.Frame):
 
         ttk.Button(self, text='clear', command = self.clear).pack(side=tk.LEFT)
 
+        self.progress = ttk.Progressbar(self, mode='indeterminate', length=80)
+        self.progress.pack(side=tk.LEFT)
+
+        self.status = ttk.Label(self)
+        self.status.pack(side=tk.LEFT)
+
 
 
 
 
-    def add_entry(self):
+    def add_entry(self, validator=None):
         """
         Создаёт пару виджетов лейбла и поля ввода
 
 
-        :param text: строка с текстом для лейбла, поля ввода и для ключа в self.values словаре.
+        :param validator: функция проверки содержимого поля (по умолчанию - is_number_or_empty)
 
         :return entry: созданный ttk.Entry объект
         """
@@ -160,7 +306,7 @@ class View(ttk.Frame):
 
         # проверка каждого нажатия клавиши на ввод числового значения в поле ввода
         entry = ttk.Entry(self, validate='key')
-        entry['validatecommand'] = (self.register(self.is_number_or_empty),
+        entry['validatecommand'] = (self.register(validator or self.is_number_or_empty),
                                     '%P')
         entry['invalidcommand'] = 'bell'  # звуковой сигнал, если нажали неправильно
         entry.pack(side=tk.LEFT)
@@ -176,6 +322,24 @@ class View(ttk.Frame):
         """
         return self.is_number(entry) or self.is_empty(entry)
 
+    def is_number_list_or_empty(self, entry: str) -> bool:
+        """
+        Проверяет, что строка - числа через запятую (допускаются пустые части, пока значение набирается)
+        """
+        return all(self.is_number_or_empty(part.strip()) for part in entry.split(','))
+
+    @staticmethod
+    def parse_numbers(entry: str):
+        """
+        Разбирает числа через запятую
+
+        :return float, если число одно, иначе кортеж float
+        """
+        numbers = tuple(float(part) for part in entry.split(',') if part.strip())
+        if len(numbers) == 1:
+            return numbers[0]
+        return numbers
+
     @staticmethod
     def is_number(entry: str) -> bool:
         """
@@ -235,11 +399,17 @@ class View(ttk.Frame):
     def entry_is_changed(self) -> bool:
         """
         Сравнивает текущие значения в виджете полей ввода со значениями в словаре,
-        который хранит предыдущие значения.
+        который хранит предыдущие значения. Если N подбирается по точности E,
+        N не сравнивается - он пересчитывается только в update_values.
 
         :return изменились ли значения в entry
         """
-        if self.get_current_values() != self.values:
+        current = self.get_current_values()
+        previous = self.values
+        if current['K'] == 'E':
+            current = {key: value for key, value in current.items() if key != 'N'}
+            previous = {key: value for key, value in previous.items() if key != 'N'}
+        if current != previous:
             return True
         return False
 
@@ -249,15 +419,11 @@ class View(ttk.Frame):
 
         :return значения base и exponent в виджете
         """
-        if self.paramN_name =='E':
-            self.countN.set(self.controller.updateN(float(self.eps_param.get()),float(self.named_param.get())))
-        #else:
-        #    self.eps_param.set(self.controller.updateEps(float(self.countN.get()),float(self.named_param.get())))
         return {'N': int(self.countN.get()),
                 'K': str(self.paramN_name),
                 'E': float(self.eps_param.get()),
                 'p': str(self.param_name),
-                'r': float(self.named_param.get()),
+                'r': self.parse_numbers(self.named_param.get()),
                 'x': int(self.named_paramx.get())}
 
     def update_values(self):
@@ -267,7 +433,8 @@ class View(ttk.Frame):
         self.values = self.get_current_values()
 
         if self.paramN_name=='E':
-            self.countN_entry.config(textvariable=self.countN)
+            self.values['N'] = self.controller.updateN(self.values['E'], self.values['r'])
+            self.countN.set(self.values['N'])
 
 
     def set_next_focus(self, next_widget):
@@ -308,7 +475,10 @@ class View(ttk.Frame):
         self.countN.set(values['N'])
 
         self.eps_param.set(values['E'])
-        self.named_param.set(values['r'])
+        if isinstance(values['r'], tuple):
+            self.named_param.set(', '.join(str(value) for value in values['r']))
+        else:
+            self.named_param.set(values['r'])
         self.named_paramx.set(values['x'])
         self.values = values
 
@@ -317,9 +487,27 @@ class View(ttk.Frame):
 
     def clear(self):
         """
-        Очищает matplotlib canvas.
+        Очищает matplotlib canvas и список нарисованных графиков контроллера.
         """
         self.canvas.clear()
+        self.controller.clear_session()
+
+    def show_progress(self, busy: bool):
+        """
+        Показывает, что контроллер считает график в фоне.
+
+        :param busy: идёт ли расчёт
+        """
+        if busy:
+            self.progress.start(10)
+        else:
+            self.progress.stop()
+
+    def show_status(self, text: str):
+        """
+        Показывает текст в строке состояния (время этапов расчёта и отрисовки)
+        """
+        self.status.config(text=text)
 
     def change(self):
         if (self.param_name == 'r'):
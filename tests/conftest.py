@@ -0,0 +1,10 @@
+"""
+Модули из каталога src импортируются под теми же именами, что и в GUI и cli (models.*, views.*)
+"""
+
+import os
+import sys
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
@@ -0,0 +1,20 @@
+from models.batch import *
+import unittest
+
+
+class TestBatch(unittest.TestCase):
+    def test_parameter_grid(self):
+        grid = parameter_grid(N=[10, 20], r=[0, 1, 2])
+        self.assertEqual(len(grid), 6)
+        self.assertEqual(grid[0], {'N': 10, 'r': 0})
+        self.assertEqual(grid[-1], {'N': 20, 'r': 2})
+
+    def test_sweep_does_not_depend_on_workers(self):
+        param_sets = parameter_grid(N=[5, 40], r=[0, 1.5], p=['r', 't'], x=[10], k=[0.065, 0.1])
+        ox_inline, w_inline = sweep(param_sets, workers=1)
+        ox_pool, w_pool = sweep(param_sets, workers=2, chunksize=3)
+        self.assertEqual(w_inline.shape, (len(param_sets), 800))
+        np.testing.assert_array_equal(ox_inline, ox_pool)
+        np.testing.assert_array_equal(w_inline, w_pool)
+        model = SumModel(k=0.1)
+        np.testing.assert_array_equal(w_inline[-1], model.generate_w_data(40, 1.5, 't', 10, 0)[1])
@@ -0,0 +1,15 @@
+from benchmarks.run import compare
+from benchmarks.bench_model import CASES
+import unittest
+
+
+class TestBenchmarks(unittest.TestCase):
+    def test_case_names_are_unique(self):
+        self.assertEqual(len({case.name for case in CASES}), len(CASES))
+
+    def test_compare_reports_regressions_over_threshold(self):
+        baseline = {'a': {'throughput': 100.0}, 'b': {'throughput': 100.0}}
+        results = {'a': {'throughput': 95.0}, 'b': {'throughput': 80.0}, 'c': {'throughput': 1.0}}
+        regressions = compare(results, baseline, threshold=0.1)
+        self.assertEqual(len(regressions), 1)
+        self.assertTrue(regressions[0].startswith('b:'))
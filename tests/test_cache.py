@@ -0,0 +1,56 @@
+from models.cache import *
+import os
+import tempfile
+import unittest
+
+
+class TestResultCache(unittest.TestCase):
+    def test_make_key_is_normalized(self):
+        self.assertEqual(make_key({'N': 6, 'r': 0, 'p': 'r'}), make_key({'p': 'r', 'r': 0.0, 'N': 6.0}))
+        self.assertNotEqual(make_key({'N': 6, 'r': 0}), make_key({'N': 7, 'r': 0}))
+
+    def test_lru_eviction_by_bytes(self):
+        cache = ResultCache(max_bytes=3 * 800 * 8)
+        for i in range(3):
+            cache.put(str(i), (np.zeros(400), np.full(400, i)))
+        self.assertEqual(len(cache), 3)
+        cache.get('0')
+        cache.put('3', (np.zeros(400), np.zeros(400)))
+        self.assertNotIn('1', cache)
+        self.assertIn('0', cache)
+        self.assertLessEqual(cache.nbytes, cache.max_bytes)
+        self.assertIsNone(cache.get('1'))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_get_or_compute_and_disk_tier(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return np.arange(3.0), np.arange(3.0) ** 2
+
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ResultCache(directory=tmp)
+            cache.get_or_compute('a', compute)
+            x, y = cache.get_or_compute('a', compute)
+            self.assertEqual(len(calls), 1)
+            warm = ResultCache(directory=tmp)
+            x, y = warm.get_or_compute('a', compute)
+            self.assertEqual(len(calls), 1)
+            np.testing.assert_array_equal(y, [0, 1, 4])
+            self.assertEqual(warm.stats()['disk_hits'], 1)
+
+    def test_disk_tier_is_bounded(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            value = (np.zeros(100), np.ones(100))
+            ResultCache(directory=tmp).put('probe', value)
+            size = os.path.getsize(os.path.join(tmp, 'probe.npz'))
+            os.remove(os.path.join(tmp, 'probe.npz'))
+            cache = ResultCache(directory=tmp, disk_max_bytes=3 * size)
+            for i, key in enumerate('abc'):
+                cache.put(key, value)
+                os.utime(os.path.join(tmp, key + '.npz'), (1000 + i, 1000 + i))
+            # чтение с диска делает 'a' самой свежей записью, поэтому вытесняется 'b'
+            self.assertIsNotNone(ResultCache(directory=tmp, disk_max_bytes=3 * size).get('a'))
+            cache.put('d', value)
+            self.assertEqual(sorted(os.listdir(tmp)), ['a.npz', 'c.npz', 'd.npz'])
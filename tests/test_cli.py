@@ -0,0 +1,40 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+
+
+def run_cli(*args):
+    code = ("import sys, cli; status = cli.main(sys.argv[1:]); "
+            "assert 'tkinter' not in sys.modules and 'matplotlib' not in sys.modules; "
+            "assert 'numba' not in sys.modules; sys.exit(status)")
+    return subprocess.run([sys.executable, '-c', code] + list(args), cwd=SRC, capture_output=True, text=True)
+
+
+class TestCli(unittest.TestCase):
+    def test_single_run_to_npy(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'w.npy')
+            result = run_cli('--N', '20', '--r', '1', '--x', '10', '-o', path)
+            self.assertEqual(result.returncode, 0, result.stderr)
+            data = np.load(path)
+            self.assertEqual(data.shape, (2, 800))
+            self.assertAlmostEqual(data[0, -1], 10)
+
+    def test_job_file_to_csv(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            job_path = os.path.join(tmp, 'jobs.json')
+            out_path = os.path.join(tmp, 'w.csv')
+            with open(job_path, 'w') as f:
+                json.dump([{'N': 10, 'r': 0.5}, {'K': 'E', 'E': 0.001, 'p': 't', 'r': 2, 'x': 4}], f)
+            result = run_cli('--job', job_path, '-o', out_path)
+            self.assertEqual(result.returncode, 0, result.stderr)
+            data = np.loadtxt(out_path, delimiter=',', skiprows=1)
+            self.assertEqual(data.shape, (1600, 3))
+            np.testing.assert_array_equal(np.unique(data[:, 0]), [0, 1])
@@ -0,0 +1,189 @@
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from controllers.controller import Controller
+from models import cache, model
+from views.view import MPLgraph
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+import types
+import unittest
+
+
+class AggGraph(FigureCanvasAgg):
+    """
+    MPLgraph без окна Tk: те же методы поверх холста Agg
+    """
+
+    def __init__(self):
+        figure = matplotlib.figure.Figure()
+        FigureCanvasAgg.__init__(self, figure)
+        self.add = figure.add_subplot(111)
+        self.lines = {}
+        self.full_data = {}
+        self.lgn = None
+        self.background = None
+        self.capturing_background = False
+
+
+for name in ('plot', 'plot_many', 'set_line', 'redraw', 'update_legend', 'blit_lines', 'clear', 'on_draw',
+             'downsample', 'on_xlim_changed', 'get_full_data'):
+    setattr(AggGraph, name, getattr(MPLgraph, name))
+
+
+class FakeRoot:
+    """
+    Заглушка tk.Tk: root.after складывает вызовы в очередь, run выполняет их, как цикл событий
+    """
+
+    def __init__(self):
+        self.queue = []
+        self.destroyed = False
+
+    def after(self, ms, callback, *args):
+        self.queue.append((callback, args))
+
+    def destroy(self):
+        self.destroyed = True
+
+    def run(self, timeout=10.0):
+        deadline = time.monotonic() + timeout
+        while self.queue:
+            if time.monotonic() > deadline:
+                raise AssertionError('фоновый расчёт не закончился за %s с' % timeout)
+            callback, args = self.queue.pop(0)
+            callback(*args)
+            time.sleep(0.001)
+
+
+class BlockingModel(model.SumModel):
+    """
+    Модель, расчёт которой ждёт отмены запроса (или падает, если задано error)
+    """
+
+    def __init__(self, error=None):
+        model.SumModel.__init__(self)
+        self.error = error
+        self.started = threading.Event()
+
+    def generate_w_data(self, N, r, p, x, E, cancel=None, **options):
+        self.started.set()
+        if self.error is not None:
+            raise self.error
+        if not cancel.wait(10):
+            raise AssertionError('запрос не был отменён')
+        raise model.Cancelled()
+
+
+def make_controller():
+    """
+    Controller без окна: представление заменено заглушкой с холстом AggGraph, а tk.Tk - FakeRoot
+    """
+    controller = Controller.__new__(Controller)
+    controller.root = FakeRoot()
+    controller.executor = ThreadPoolExecutor(max_workers=1)
+    controller.request_id = 0
+    controller.pending = None
+    controller.cancel_event = None
+    controller.model = model.SumModel()
+    controller.result_cache = cache.ResultCache()
+    controller.view = types.SimpleNamespace(canvas=AggGraph(), status=[], progress=[])
+    controller.view.show_status = controller.view.status.append
+    controller.view.show_progress = controller.view.progress.append
+    controller.colors = ['red', 'blue', 'black']
+    controller.color_id = 0
+    controller.session = []
+    return controller
+
+
+VALUES = {'N': 6, 'K': 'N', 'E': 0.01, 'p': 'r', 'r': 0, 'x': 150}
+
+
+def draw(controller, values):
+    controller.get_plot_data(dict(values))
+    controller.update_view_plot()
+
+
+class TestSession(unittest.TestCase):
+    def test_lines_and_session_are_keyed_by_parameters(self):
+        controller = make_controller()
+        draw(controller, VALUES)
+        draw(controller, dict(VALUES, r=0.0))
+        draw(controller, dict(VALUES, x=100))
+        draw(controller, dict(VALUES, r=(1, 2)))
+        controller.set_constants(k=1.0)
+        draw(controller, VALUES)
+        canvas = controller.view.canvas
+        self.assertEqual(len(canvas.lines), 5)
+        self.assertEqual([line.get_label() for line in canvas.lines.values()],
+                         ['N=6 r=0.0', 'N=6 r=0.0', 'N=6 r=1.0', 'N=6 r=2.0', 'N=6 r=0.0'])
+        self.assertEqual([curve.color for curve in controller.session],
+                         [line.get_color() for line in canvas.lines.values()])
+
+        canvas.clear()
+        controller.clear_session()
+        draw(controller, VALUES)
+        self.assertEqual((len(canvas.lines), len(controller.session)), (1, 1))
+
+
+class TestBackgroundPlot(unittest.TestCase):
+    def setUp(self):
+        self.controller = make_controller()
+        self.addCleanup(self.controller.executor.shutdown, cancel_futures=True)
+
+    def test_result_is_drawn_from_event_loop(self):
+        controller = self.controller
+        controller.update_view(VALUES)
+        self.assertEqual(controller.view.progress, [True])
+        self.assertEqual(controller.view.canvas.lines, {})
+        controller.root.run()
+        self.assertEqual(controller.view.progress, [True, False])
+        self.assertIsNone(controller.pending)
+        self.assertEqual(len(controller.view.canvas.lines), 1)
+        self.assertEqual([curve.label for curve in controller.session], ['N=6 r=0.0'])
+
+    def test_new_request_cancels_running_one(self):
+        controller = self.controller
+        controller.model = BlockingModel()
+        controller.update_view(VALUES)
+        first = controller.cancel_event
+        self.assertTrue(controller.model.started.wait(10))
+        controller.model = model.SumModel()
+        controller.update_view(dict(VALUES, r=1))
+        self.assertTrue(first.is_set())
+        self.assertFalse(controller.cancel_event.is_set())
+        controller.root.run()
+        self.assertEqual([curve.label for curve in controller.session], ['N=6 r=1.0'])
+        self.assertEqual(controller.view.status, [])
+
+    def test_error_is_shown_in_status(self):
+        controller = self.controller
+        controller.model = BlockingModel(error=ValueError('плохое r'))
+        with self.assertLogs('controllers.controller', 'ERROR'):
+            controller.update_view(VALUES)
+            controller.root.run()
+        self.assertEqual(controller.view.status, ['Ошибка расчёта: плохое r'])
+        self.assertEqual(controller.view.progress, [True, False])
+        self.assertEqual(controller.session, [])
+
+    def test_close_cancels_and_shuts_down(self):
+        controller = self.controller
+        controller.model = BlockingModel()
+        controller.update_view(VALUES)
+        running = controller.pending
+        event = controller.cancel_event
+        self.assertTrue(controller.model.started.wait(10))
+        controller.on_close()
+        self.assertTrue(event.is_set())
+        self.assertTrue(controller.root.destroyed)
+        with self.assertRaises(model.Cancelled):
+            running.result(10)
+        with self.assertRaises(RuntimeError):
+            controller.executor.submit(print)
+
+
+if __name__ == '__main__':
+    unittest.main()
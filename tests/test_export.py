@@ -0,0 +1,46 @@
+from models.export import *
+import importlib.util
+import tempfile
+import unittest
+
+
+def make_curves(count, start=0):
+    x = np.linspace(0.001, 150, 100)
+    return [Curve('N=6 r=%d' % i, x, np.exp(-x / (i + 1)), 'red', {'N': 6, 'p': 'r', 'r': float(i), 'k': 0.065})
+            for i in range(start, start + count)]
+
+
+class TestExport(unittest.TestCase):
+    def check_round_trip(self, extension):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'session' + extension)
+            save_curves(path, make_curves(2))
+            save_curves(path, make_curves(3, start=2), append=True)
+            loaded = load_curves(path)
+            expected = make_curves(5)
+            self.assertEqual([curve.label for curve in loaded], [curve.label for curve in expected])
+            for curve, reference in zip(loaded, expected):
+                np.testing.assert_array_equal(curve.x, reference.x)
+                np.testing.assert_array_equal(curve.y, reference.y)
+                self.assertEqual((curve.color, curve.params), (reference.color, reference.params))
+            save_curves(path, make_curves(1))
+            self.assertEqual(len(load_curves(path)), 1)
+
+    def test_npz(self):
+        self.check_round_trip('.npz')
+
+    @unittest.skipUnless(importlib.util.find_spec('h5py'), 'нужен пакет h5py')
+    def test_hdf5(self):
+        self.check_round_trip('.h5')
+
+    @unittest.skipUnless(importlib.util.find_spec('pyarrow'), 'нужен пакет pyarrow')
+    def test_arrow(self):
+        self.check_round_trip('.arrow')
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            save_curves('session.txt', make_curves(1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+from models.fitting import *
+from models import fitting
+from unittest import mock
+import unittest
+
+
+class TestFitting(unittest.TestCase):
+    def test_series_gradient_matches_finite_differences(self):
+        model = SumModel()
+        r, t = np.array([0.0, 1.0, 2.5]), np.array([5.0, 20.0, 100.0])
+        w, gradient = series_gradient(model, r, t, 60)
+        np.testing.assert_allclose(w, model.calculate_sum_array(r, t, 60), rtol=1e-12)
+        for name in ('k', 'alpha', 'c'):
+            h = 1e-6 * getattr(model, name)
+            up = SumModel(**{name: getattr(model, name) + h}).calculate_sum_array(r, t, 60)
+            down = SumModel(**{name: getattr(model, name) - h}).calculate_sum_array(r, t, 60)
+            np.testing.assert_allclose(gradient[name], (up - down) / (2 * h), rtol=1e-5, atol=1e-8)
+
+    def test_fit_recovers_constants_for_many_sensors(self):
+        r = np.linspace(0, 3.5, 12)
+        t = np.linspace(1, 150, 60)
+        w = SumModel(k=0.09, alpha=0.012).calculate_sum_array(r[:, None], t, 60)
+        result = fit_constants(r, t, w, model=SumModel(k=0.03, alpha=0.05), N=60, starts=3)
+        self.assertTrue(result.converged.all())
+        np.testing.assert_allclose(result.k, 0.09, rtol=1e-6)
+        np.testing.assert_allclose(result.alpha, 0.012, rtol=1e-6)
+        np.testing.assert_array_equal(result.c, 1.35)
+
+    def test_residuals_in_blocks_match_single_block(self):
+        model = SumModel()
+        spatial = fitting._spatial_factors(model, np.linspace(0, 3, 7), 40)
+        t = np.tile(np.linspace(1, 150, 30), (7, 1))
+        w = np.ones_like(t)
+        log_k, log_alpha = np.log(np.linspace(0.03, 0.1, 7)), np.log(np.linspace(0.01, 0.05, 7))
+        scale_k = (bessel_zeros(40) / model.R) ** 2 / model.c
+        args = (spatial, t, w, log_k, log_alpha, scale_k, 2 / (model.l * model.c), True)
+        expected = fitting._residuals(*args)
+        # по две задачи в блоке, последний блок неполный
+        with mock.patch.object(fitting, '_BLOCK_ELEMENTS', 2 * 30 * 40):
+            blocked = fitting._residuals(*args)
+        for value, reference in zip(blocked, expected):
+            np.testing.assert_allclose(value, reference, rtol=1e-14)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,29 @@
+from views.lod import downsample_minmax
+import unittest
+
+import numpy as np
+
+
+class TestLod(unittest.TestCase):
+    def test_keeps_extremes_of_each_bucket(self):
+        x = np.linspace(0, 10, 100001)
+        y = np.sin(50 * x) * np.exp(-x / 5)
+        dx, dy = downsample_minmax(x, y, 500)
+        self.assertLessEqual(len(dx), 2 * 500 + 2)
+        self.assertTrue(np.all(np.diff(dx) > 0))
+        self.assertEqual((dx[0], dx[-1]), (0, 10))
+        self.assertEqual((dy.min(), dy.max()), (y.min(), y.max()))
+        bucket = (x * 50).astype(int).clip(0, 499) == 123
+        self.assertIn(y[bucket].min(), dy)
+        self.assertIn(y[bucket].max(), dy)
+
+    def test_short_curve_and_visible_range(self):
+        x = np.linspace(0, 1, 10)
+        dx, dy = downsample_minmax(x, x ** 2, 100)
+        np.testing.assert_array_equal(dx, x)
+        x = np.linspace(0, 100, 10001)
+        dx, dy = downsample_minmax(x, x, 10, x_range=(40, 50))
+        self.assertLessEqual(dx[0], 40)
+        self.assertGreaterEqual(dx[-1], 50)
+        self.assertGreater(dx[0], 39)
+        self.assertLess(dx[-1], 51)
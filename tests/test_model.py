@@ -1,5 +1,15 @@
-from src.models.model import *
+from models.model import *
+from models.model import _decay_rates
+import importlib.util
+import io
+import os
+import subprocess
+import sys
+import tempfile
 import unittest
+from unittest import mock
+
+from scipy.special import jn_zeros
 
 
 class TestModel(unittest.TestCase):
@@ -11,3 +21,225 @@ class TestModel(unittest.TestCase):
         self.assertEqual(exp_data[1][-1], 400)
         self.assertEqual(exp_data[0][0], 0)
         self.assertEqual(exp_data[0][-1], 10)
+
+    def test_vectorized_matches_scalar(self):
+        vectorized = SumModel(backend='numpy')
+        scalar = SumModel(backend='python')
+        for p, r in (('r', 0), ('r', 2.5), ('t', 3)):
+            ox_v, w_v = vectorized.generate_w_data(40, r, p, 150, 0.01)
+            ox_s, w_s = scalar.generate_w_data(40, r, p, 150, 0.01)
+            np.testing.assert_array_equal(ox_v, ox_s)
+            np.testing.assert_allclose(w_v, w_s, rtol=0, atol=1e-12)
+
+    def test_term_tables_cached(self):
+        model = SumModel()
+        coef, rate = model.term_tables(10)
+        mu = bessel_zeros(10)
+        np.testing.assert_allclose(coef, 5 * jv(1, mu / 4) / (mu * jv(1, mu) ** 2), rtol=1e-14)
+        np.testing.assert_allclose(rate, (0.5 * 0.065 * (mu / 4) ** 2 + 2 * 0.005) / (0.5 * 1.35), rtol=1e-14)
+        hits = _decay_rates.cache_info().hits
+        SumModel().term_tables(20)
+        self.assertEqual(_decay_rates.cache_info().hits, hits + 1)
+
+    def test_bessel_zeros_match_scipy(self):
+        np.testing.assert_allclose(bessel_zeros(1500), jn_zeros(0, 1500), rtol=1e-14)
+
+    def test_bessel_zeros_grow_beyond_initial_table(self):
+        model = SumModel()
+        ox, w = model.generate_w_data(3000, 1, 'r', 150, 0.01)
+        self.assertEqual(len(bessel_zeros(3000)), 3000)
+        self.assertTrue(np.all(np.isfinite(w)))
+
+    def test_bessel_zeros_disk_cache(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'zeros.npy')
+            BesselZeros(path)(300)
+            self.assertTrue(os.path.exists(path))
+            cached = BesselZeros(path)
+            np.testing.assert_array_equal(cached(300), bessel_zeros(300))
+            self.assertEqual(len(cached), len(np.load(path)))
+
+    def test_number_of_iterations_matches_linear_search(self):
+        model = SumModel()
+        eps = np.array([1e-1, 1e-2, 1e-4, 1e-8])[:, None]
+        t = np.array([0.001, 0.01, 0.5, 3, 150])[None, :]
+        expected = np.empty(np.broadcast(eps, t).shape, dtype=int)
+        for i in range(eps.shape[0]):
+            for j in range(t.shape[1]):
+                n = 1
+                while model.phi(n, t[0, j]) > eps[i, 0]:
+                    n += 1
+                expected[i, j] = n
+                self.assertEqual(model.calculate_number_of_iterations(eps[i, 0], t[0, j]), n)
+        np.testing.assert_array_equal(model.calculate_number_of_iterations_array(eps, t), expected)
+
+    def test_adaptive_generate_w_data(self):
+        model = SumModel()
+        ox, w, n_terms = model.generate_w_data(0, 1, 'r', 150, 1e-3, adaptive=True)
+        np.testing.assert_array_equal(n_terms, model.calculate_number_of_iterations_array(1e-3, ox))
+        self.assertGreater(n_terms[0], n_terms[-1])
+        exact = model.calculate_sum_array(r=1, t=ox, N=int(n_terms.max()) + 50)
+        self.assertLess(np.max(np.abs(w - exact)), 1e-3)
+        # при одинаковом числе слагаемых в каждой точке совпадает с обычным расчётом
+        np.testing.assert_allclose(model.calculate_sum_truncated(1, ox, 30),
+                                   model.calculate_sum_array(1, ox, 30), rtol=0, atol=1e-12)
+        # на сгущающейся сетке n_terms считается один раз для каждой новой точки и идёт в порядке ox
+        with mock.patch.object(model, '_line_terms', wraps=model._line_terms) as line_terms:
+            ox, w, n_terms = model.generate_w_data(0, 1, 'r', 150, 1e-3, adaptive=True, points=200,
+                                                   spacing='adaptive')
+        self.assertEqual(sum(len(call.args[0]) for call in line_terms.call_args_list), 200)
+        np.testing.assert_array_equal(n_terms, model.calculate_number_of_iterations_array(1e-3, ox))
+
+    def test_w_field(self):
+        model = SumModel()
+        r = np.linspace(0, 4, 37)
+        t = np.linspace(0.001, 150, 53)
+        expected = model.calculate_sum_array(r[:, None], t[None, :], 60)
+        blocks = list(model.iter_w_field(r, t, 60, max_bytes=60 * 53 * 8 + 10 * (60 + 53) * 8))
+        self.assertEqual([(start, stop) for start, stop, block in blocks], [(0, 10), (10, 20), (20, 30), (30, 37)])
+        np.testing.assert_allclose(model.generate_w_field(r, t, 60), expected, rtol=0, atol=1e-12)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'field.npy')
+            model.generate_w_field(r, t, 60, out=path)
+            np.testing.assert_allclose(np.load(path), expected, rtol=0, atol=1e-12)
+
+    def test_w_family_matches_single_curves(self):
+        model = SumModel()
+        for p, values in (('r', [0.0, 1.0, 2.5]), ('t', [1.0, 30.0])):
+            ox, w = model.generate_w_family(60, values, p, 150, points=200)
+            self.assertEqual(w.shape, (len(values), 200))
+            for value, row in zip(values, w):
+                single_ox, single_w = model.generate_w_data(60, value, p, 150, 0, points=200)
+                np.testing.assert_array_equal(ox, single_ox)
+                np.testing.assert_allclose(row, single_w, rtol=0, atol=1e-12)
+
+    def test_cancelled_computation(self):
+        import threading
+        cancel = threading.Event()
+        model = SumModel()
+        np.testing.assert_array_equal(model.generate_w_data(20, 1, 'r', 150, 0, cancel=cancel)[1],
+                                      model.generate_w_data(20, 1, 'r', 150, 0)[1])
+        cancel.set()
+        with self.assertRaises(Cancelled):
+            model.generate_w_data(20, 1, 'r', 150, 0, cancel=cancel)
+        with self.assertRaises(Cancelled):
+            model.generate_w_family(20, [0, 1], 'r', 150, cancel=cancel)
+        with self.assertRaises(Cancelled):
+            SumModel(backend='python').generate_w_data(20, 1, 'r', 150, 0, cancel=cancel)
+
+    def test_grid_options(self):
+        model = SumModel()
+        ox, w = model.generate_w_data(30, 1, 'r', 150, 0.01)
+        np.testing.assert_array_equal(ox, np.linspace(0.001, 150, 800))
+        ox, w = model.generate_w_data(30, 1, 'r', 150, 0.01, points=200, start=0.01, spacing='log')
+        self.assertEqual(len(ox), 200)
+        self.assertAlmostEqual(ox[0], 0.01)
+        self.assertAlmostEqual(ox[1] / ox[0], ox[-1] / ox[-2])
+        with self.assertRaises(ValueError):
+            model.generate_w_data(30, 1, 'r', 150, 0.01, start=0, spacing='log')
+
+    def test_adaptive_grid_refines_where_curve_bends(self):
+        model = SumModel()
+        ox, w = model.generate_w_data(100, 0.5, 'r', 150, 0.01, points=400, spacing='adaptive')
+        self.assertEqual(len(ox), 400)
+        self.assertTrue(np.all(np.diff(ox) > 0))
+        self.assertEqual((ox[0], ox[-1]), (0.001, 150))
+        # решение быстрее всего меняется при малых t, туда и должны попасть точки
+        self.assertGreater(np.count_nonzero(ox < 15), 3 * 40)
+        np.testing.assert_allclose(w, model.calculate_sum_array(0.5, ox, 100), rtol=0, atol=1e-12)
+
+    def test_custom_initial_profile(self):
+        import config
+        default = SumModel()
+        np.testing.assert_allclose(SumModel(psi=config.psi).term_tables(20)[0], default.term_tables(20)[0],
+                                   rtol=0, atol=2e-2)
+        r = np.linspace(0, 4, 2001)
+        sampled = SumModel(psi=np.where(r <= 1, 10.0, 0.0))
+        self.assertEqual(sampled.psi, SampledProfile(r, np.where(r <= 1, 10.0, 0.0)))
+        np.testing.assert_allclose(sampled.term_tables(20)[0], default.term_tables(20)[0], rtol=0, atol=5e-2)
+        # J0(μ1·r/R) проецируется сам на себя
+        smooth = SumModel(psi=lambda x: j0(bessel_zeros(1)[0] * x / 4))
+        np.testing.assert_allclose(smooth.term_tables(5)[0], [1, 0, 0, 0, 0], rtol=0, atol=1e-6)
+        self.assertIn('psi', smooth.constants())
+
+        def make(level):
+            return lambda x: np.where(x <= 1, level, 0.0)
+        self.assertNotEqual(SumModel(psi=make(1.0)).constants(), SumModel(psi=make(5.0)).constants())
+        self.assertEqual(SumModel(psi=make(1.0)).constants(), SumModel(psi=make(1.0)).constants())
+
+    def test_single_precision_within_error_bound(self):
+        double = SumModel()
+        single = SumModel(precision='single')
+        t = np.linspace(0.001, 150, 800)
+        w64 = double.calculate_sum_array(1.0, t, 500)
+        w32 = single.calculate_sum_array(1.0, t, 500)
+        self.assertEqual(w32.dtype, np.float32)
+        self.assertLess(single.last_error_bound, double.calculate_eps_of_iterations(500, 0.001))
+        self.assertLessEqual(np.max(np.abs(w32 - w64)), single.last_error_bound)
+        ox, w, n_terms = single.generate_w_data(0, 1, 'r', 150, 1e-3, adaptive=True)
+        exact = double.calculate_sum_truncated(1, ox, n_terms)
+        self.assertLessEqual(np.max(np.abs(w - exact)), single.last_error_bound)
+        field = single.generate_w_field(np.linspace(0, 4, 20), t, 100)
+        self.assertEqual(field.dtype, np.float32)
+        self.assertLessEqual(np.max(np.abs(field - double.generate_w_field(np.linspace(0, 4, 20), t, 100))),
+                             single.last_error_bound)
+
+    def test_kernel_j0_matches_scipy(self):
+        from scipy.special import j0 as scipy_j0
+        from models import kernels
+        x = np.concatenate([np.linspace(0, 30, 3001), np.linspace(30, 5000, 2001)])
+        np.testing.assert_allclose([kernels.j0(value) for value in x], scipy_j0(x), rtol=0, atol=1e-12)
+
+    def test_backend_selection(self):
+        from models import kernels
+        with self.assertRaises(ValueError):
+            SumModel(backend='fortran')
+        os.environ['HEAT_BACKEND'] = 'python'
+        try:
+            self.assertEqual(SumModel().backend, 'python')
+        finally:
+            del os.environ['HEAT_BACKEND']
+        if kernels.AVAILABLE:
+            self.assertEqual(SumModel(backend='numba').backend, 'numba')
+        else:
+            with self.assertWarns(RuntimeWarning):
+                self.assertEqual(SumModel(backend='numba').backend, 'numpy')
+
+    def test_numba_kernel_matches_numpy(self):
+        from models import kernels
+        model = SumModel()
+        t = np.linspace(0.001, 150, 50)
+        coef, rate = model.term_tables(30)
+        result = kernels.sum_series(np.full(50, 1.5), t, np.array(coef), np.array(rate), np.array(bessel_zeros(30)), 4.0)
+        np.testing.assert_allclose(result, model.calculate_sum_array(1.5, t, 30), rtol=0, atol=1e-12)
+
+    @unittest.skipUnless(importlib.util.find_spec('numba'), 'нужен пакет numba')
+    def test_numba_backend_in_fresh_processes(self):
+        # тесты, GUI и cli импортируют ядра под одним именем models.kernels, поэтому дисковый кэш numba,
+        # записанный одним процессом, загружается в следующих
+        expected = SumModel(backend='numba').generate_w_data(50, 1, 'r', 150, 0.01)[1]
+        code = ("import sys, numpy; from models.model import SumModel; "
+                "numpy.save(sys.stdout.buffer, SumModel(backend='numba').generate_w_data(50, 1, 'r', 150, 0.01)[1])")
+        src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+        for _ in range(2):
+            result = subprocess.run([sys.executable, '-c', code], cwd=src, capture_output=True)
+            self.assertEqual(result.returncode, 0, result.stderr.decode())
+            np.testing.assert_allclose(np.load(io.BytesIO(result.stdout)), expected, rtol=0, atol=1e-12)
+
+    def test_streaming_time_series(self):
+        model = SumModel()
+        chunks = list(model.iter_w_time(1.5, 0.01, 0.05, chunk=100, t_stop=150, N=200))
+        t = np.concatenate([t for t, w in chunks])
+        w = np.concatenate([w for t, w in chunks])
+        self.assertTrue(all(len(t) == 100 for t, w in chunks[:-1]))
+        self.assertLessEqual(t[-1], 150)
+        np.testing.assert_allclose(t, 0.01 + 0.05 * np.arange(len(t)))
+        np.testing.assert_allclose(w, model.calculate_sum_array(1.5, t, 200), rtol=0, atol=1e-12)
+
+        stream = model.iter_w_time(1.5, 0.01, 0.05, chunk=100, epsilon=1e-6)
+        t, w = next(stream)
+        early_terms = model.last_terms
+        for _ in range(20):
+            t, w = next(stream)
+        self.assertLess(model.last_terms, early_terms)
+        self.assertLess(np.max(np.abs(w - model.calculate_sum_array(1.5, t, early_terms))), 1e-6)
@@ -0,0 +1,45 @@
+from models import profiling
+from models.model import SumModel
+import json
+import os
+import tempfile
+import unittest
+
+
+class TestProfiling(unittest.TestCase):
+    def tearDown(self):
+        profiling.set_sink(None)
+
+    def test_disabled_span_is_shared_noop(self):
+        profiling.set_sink(None)
+        self.assertIs(profiling.span('a'), profiling.span('b'))
+        with profiling.span('a') as span:
+            span.set(terms=1)
+
+    def test_model_spans_go_to_ring_buffer(self):
+        sink = profiling.RingBufferSink(maxlen=10)
+        profiling.set_sink(sink)
+        model = SumModel()
+        model.generate_w_data(20, 0, 'r', 10, 0.01)
+        model.calculate_number_of_iterations(0.01, 1)
+        record = sink.last('SumModel.generate_w_data')
+        self.assertEqual((record['points'], record['terms'], record['evaluations']), (800, 20, 16000))
+        self.assertGreater(record['seconds'], 0)
+        self.assertEqual(sink.last()['name'], 'SumModel.calculate_number_of_iterations')
+        self.assertEqual(sink.last(('SumModel.generate_w_data', 'SumModel.generate_w_family'))['name'],
+                         'SumModel.generate_w_data')
+
+    def test_json_lines_sink(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'spans.jsonl')
+            profiling.set_sink(profiling.JsonLinesSink(path))
+            with profiling.span('a', points=3):
+                pass
+            with self.assertRaises(ValueError):
+                with profiling.span('b'):
+                    raise ValueError
+            with open(path) as f:
+                records = [json.loads(line) for line in f]
+            self.assertEqual([record['name'] for record in records], ['a', 'b'])
+            self.assertEqual(records[0]['points'], 3)
+            self.assertEqual(records[1]['error'], 'ValueError')
@@ -0,0 +1,36 @@
+from models.surrogate import *
+import os
+import tempfile
+import unittest
+
+
+class TestSurrogate(unittest.TestCase):
+    def test_matches_series_within_tolerance(self):
+        model = SumModel()
+        surrogate = build_surrogate(model, 1, tol=1e-6)
+        self.assertLessEqual(surrogate.error, 1e-6)
+        rng = np.random.default_rng(0)
+        r = rng.uniform(0, model.R, 2000)
+        t = np.exp(rng.uniform(0, np.log(model.T), 2000))
+        exact = model.calculate_sum_array(r, t, model.calculate_number_of_iterations(5e-7, 1))
+        np.testing.assert_allclose(surrogate(r, t), exact, atol=2e-6)
+        np.testing.assert_allclose(surrogate([0.0, model.R], [1, model.T]),
+                                   model.calculate_sum_array([0.0, model.R], [1, model.T], 200), atol=1e-6)
+
+    def test_save_and_load_memory_mapped(self):
+        surrogate = build_surrogate(SumModel(), 5, 100, tol=1e-5)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'surrogate.npy')
+            surrogate.save(path)
+            loaded = load_surrogate(path)
+            self.assertIsInstance(loaded.packed, np.memmap)
+            self.assertEqual(loaded.shape, surrogate.shape)
+            r, t = np.linspace(0, 4, 50), np.linspace(5, 100, 50)
+            np.testing.assert_array_equal(loaded(r, t), surrogate(r, t))
+            with self.assertRaises(ValueError):
+                loaded(1.0, 200.0)
+            # отображение файла закрывается до удаления каталога
+            del loaded
+
+if __name__ == '__main__':
+    unittest.main()